@@ -0,0 +1,127 @@
+import threading
+from collections.abc import Sequence
+from datetime import date
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+
+# チャートと既定のスコアが共有する MA だけをメモ化する（任意の score_ma でキャッシュが膨らまないように）
+MEMOIZED_MA_WINDOWS = (20, 60, 200)
+
+
+class PriceSeries(Sequence):
+    """Daily closes as NumPy columns (``datetime64[D]`` dates, ``float64`` closes).
+
+    Behaves like the legacy ``List[Tuple[str, float]]`` history: indexing
+    returns ``(iso_date, close)``, iteration yields those tuples, and it
+    compares equal to an equivalent list.  Slicing returns a ``PriceSeries``
+    view over the same arrays without copying.
+
+    Moving averages for ``MEMOIZED_MA_WINDOWS`` are memoized (``moving_average``),
+    so every consumer of one series — scoring, chart columns — shares a single
+    pass; other windows are computed on each call.
+    """
+
+    __slots__ = ("dates", "closes", "_iso_dates", "_ma_cache", "_ma_lock")
+
+    def __init__(self, dates: np.ndarray, closes: np.ndarray, iso_dates: Optional[List[str]] = None):
+        self.dates = np.asarray(dates, dtype="datetime64[D]")
+        self.closes = np.asarray(closes, dtype=float)
+        if len(self.dates) != len(self.closes):
+            raise ValueError("dates and closes must have the same length")
+        self._iso_dates = iso_dates
+        self._ma_cache: Dict[int, np.ndarray] = {}
+        self._ma_lock = threading.Lock()
+
+    def __reduce__(self):
+        # プロセスプールへ渡すときはロックと MA キャッシュを含めない
+        return PriceSeries, (self.dates, self.closes, self._iso_dates)
+
+    @classmethod
+    def from_tuples(cls, history) -> "PriceSeries":
+        if isinstance(history, PriceSeries):
+            return history
+        iso_dates = [str(d) for d, _ in history]
+        closes = np.fromiter((c for _, c in history), dtype=float, count=len(iso_dates))
+        return cls(np.array(iso_dates, dtype="datetime64[D]"), closes, iso_dates)
+
+    def to_tuples(self) -> List[Tuple[str, float]]:
+        return list(zip(self.iso_dates(), self.closes.tolist()))
+
+    def iso_dates(self) -> List[str]:
+        if self._iso_dates is None:
+            self._iso_dates = np.datetime_as_string(self.dates, unit="D").tolist()
+        return self._iso_dates
+
+    def date_values(self) -> List[date]:
+        return self.dates.tolist()
+
+    def moving_average(self, window: int) -> np.ndarray:
+        """Read-only ``rolling_mean(self.closes, window)``; memoized for ``MEMOIZED_MA_WINDOWS``."""
+
+        if window not in MEMOIZED_MA_WINDOWS:
+            ma = rolling_mean(self.closes, window)
+            ma.flags.writeable = False
+            return ma
+        with self._ma_lock:
+            ma = self._ma_cache.get(window)
+            if ma is None:
+                ma = rolling_mean(self.closes, window)
+                ma.flags.writeable = False
+                self._ma_cache[window] = ma
+            return ma
+
+    def __len__(self) -> int:
+        return len(self.closes)
+
+    def __getitem__(self, index: Union[int, slice]):
+        if isinstance(index, slice):
+            iso_dates = self._iso_dates[index] if self._iso_dates is not None else None
+            return PriceSeries(self.dates[index], self.closes[index], iso_dates)
+        return self.iso_dates()[index], float(self.closes[index])
+
+    def __iter__(self) -> Iterator[Tuple[str, float]]:
+        return iter(zip(self.iso_dates(), self.closes.tolist()))
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, PriceSeries):
+            return bool(
+                np.array_equal(self.dates, other.dates) and np.array_equal(self.closes, other.closes)
+            )
+        if isinstance(other, (list, tuple)):
+            return self.to_tuples() == [tuple(p) for p in other]
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        if not len(self):
+            return "PriceSeries([])"
+        return f"PriceSeries({len(self)} points, {self.iso_dates()[0]}..{self.iso_dates()[-1]})"
+
+
+def rolling_mean(closes: np.ndarray, window: int) -> np.ndarray:
+    """Mean of each trailing ``window`` of ``closes`` (NaN until the window fills).
+
+    Window sums are accumulated element by element in the same order as the
+    scalar ``sum()`` so every value is bit-identical to
+    ``scoring.technical.moving_average``; cumulative-sum differencing is
+    faster but drifts in the last bits.
+    """
+
+    result = np.full(len(closes), np.nan)
+    count = len(closes) - window + 1
+    if count <= 0:
+        return result
+    acc = closes[:count].copy()
+    for offset in range(1, window):
+        acc += closes[offset : offset + count]
+    result[window - 1 :] = acc / window
+    return result
+
+
+def as_price_series(history) -> PriceSeries:
+    """Adapter for callers that still pass ``List[Tuple[str, float]]``."""
+
+    return PriceSeries.from_tuples(history)
@@ -1,8 +1,13 @@
+import asyncio
 from datetime import date, datetime, time, timedelta, timezone
-from typing import List, Optional
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures import wait as wait_futures
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
 import logging
+import os
 from enum import Enum
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
 
@@ -14,14 +19,35 @@ from services.sp500_market_service import SP500MarketService
 from services.macro_data_service import MacroDataService
 from services.event_service import EventService
 from services.nav_service import FundNavService
+from services.fx_service import FxRateProvider
 from services.backtest_service import BacktestService
+from services.cache import CacheEntry, SingleFlightCache
+from services import price_series_formats
+from services.serialization import SerializedBody
+from services.offload import BlockingPool
+from services.snapshot_refresher import SnapshotRefresher
 
 
 # ======================
 # FastAPI & CORS Config
 # ======================
 
-app = FastAPI(title="S&P500 Timing API")
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    if snapshot_refresher is not None:
+        snapshot_refresher.start()
+    yield
+    if snapshot_refresher is not None:
+        snapshot_refresher.stop()
+    _io_pool.shutdown()
+    _backtest_pool.shutdown()
+    backtest_service.shutdown()
+    _refresh_executor.shutdown(wait=False, cancel_futures=True)
+    _fetch_executor.shutdown(wait=False, cancel_futures=True)
+    macro_service.shutdown()
+
+
+app = FastAPI(title="S&P500 Timing API", lifespan=lifespan)
 
 # 本番用 CORS（Vercel の URL を後で追加）
 # 例: https://time-to-sell-web--2.vercel.app
@@ -37,6 +63,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
 
@@ -54,6 +81,24 @@ class IndexType(str, Enum):
     ORUKAN_JPY = "orukan_jpy"
 
 
+# current_price の通貨（SP500 は円建て基準価額、ORUKAN は ACWI(USD)、NIFTY50 はインドルピー）
+INDEX_CURRENCY: Dict[IndexType, str] = {
+    IndexType.SP500: "JPY",
+    IndexType.SP500_JPY: "JPY",
+    IndexType.TOPIX: "JPY",
+    IndexType.NIKKEI: "JPY",
+    IndexType.NIFTY50: "INR",
+    IndexType.ORUKAN: "USD",
+    IndexType.ORUKAN_JPY: "JPY",
+}
+
+
+class PriceSeriesFormat(str, Enum):
+    ROWS = "rows"
+    COLUMNAR = "columnar"
+    F32 = "f32"
+
+
 class PositionRequest(BaseModel):
     total_quantity: float
     avg_cost: float
@@ -77,7 +122,46 @@ class EvaluateResponse(BaseModel):
     technical_details: dict
     macro_details: dict
     event_details: dict
-    price_series: List[PricePoint]
+    price_series: Optional[List[PricePoint]] = None
+
+
+# 1リクエストで評価できるポジション数の上限
+MAX_BATCH_POSITIONS = 200
+
+
+class BatchEvaluateRequest(BaseModel):
+    positions: List[PositionRequest] = Field(..., min_length=1, max_length=MAX_BATCH_POSITIONS)
+
+
+class PositionEvaluation(BaseModel):
+    index_type: IndexType
+    score_ma: int
+    currency: str
+    current_price: float
+    market_value: float
+    unrealized_pnl: float
+    scores: dict
+
+
+class PortfolioTotal(BaseModel):
+    currency: str
+    market_value: float
+    cost_basis: float
+    unrealized_pnl: float
+
+
+class BatchEvaluateResponse(BaseModel):
+    positions: List[PositionEvaluation]
+    # 通貨ごとの合計。total は全ポジションが同じ通貨のときだけ返す
+    totals: List[PortfolioTotal]
+    total: Optional[PortfolioTotal] = None
+
+
+class QuoteResponse(BaseModel):
+    index_type: IndexType
+    price: float
+    source: str
+    as_of: str
 
 
 class SyntheticNavResponse(BaseModel):
@@ -128,16 +212,55 @@ class BacktestResponse(BaseModel):
     buy_hold_history: List[PortfolioPoint]
 
 
+class BacktestCompareRequest(BaseModel):
+    start_date: date
+    end_date: date
+    initial_cash: float
+    buy_threshold: float = 40.0
+    sell_threshold: float = 80.0
+    index_types: List[IndexType]
+    score_ma: int = Field(200)
+
+
+class BacktestSweepRequest(BaseModel):
+    start_date: date
+    end_date: date
+    initial_cash: float
+    buy_thresholds: List[float] = Field(default_factory=lambda: [40.0])
+    sell_thresholds: List[float] = Field(default_factory=lambda: [80.0])
+    index_type: IndexType = IndexType.SP500
+    score_mas: List[int] = Field(default_factory=lambda: [200])
+
+
+class BacktestSweepResult(BaseModel):
+    rank: int
+    buy_threshold: float
+    sell_threshold: float
+    score_ma: int
+    final_value: float
+    total_return_pct: float
+    cagr_pct: float
+    max_drawdown_pct: float
+    trade_count: int
+
+
+class BacktestSweepResponse(BaseModel):
+    buy_and_hold_final: float
+    results: List[BacktestSweepResult]
+
+
 # ======================
 # Services
 # ======================
 
 logger = logging.getLogger(__name__)
 
-market_service = SP500MarketService()
+# USD/JPY は1つのプロバイダ（TTL キャッシュ）を全経路で共有する
+fx_provider = FxRateProvider()
+market_service = SP500MarketService(fx_provider=fx_provider)
 macro_service = MacroDataService()
 event_service = EventService()
-nav_service = FundNavService()
+nav_service = FundNavService(fx_provider=fx_provider)
 backtest_service = BacktestService(market_service, macro_service, event_service)
 
 JST = timezone(timedelta(hours=9))
@@ -151,9 +274,10 @@ def to_jst_iso(value: date) -> str:
 # Cache
 # ======================
 
-_cache_ttl = timedelta(seconds=60)
-_cached_snapshot = {}
-_cached_at: dict[str, datetime] = {}
+# エンドポイントは async。キャッシュヒットはイベントループ上で返し、ブロッキングな取得・計算だけを
+# 専用プールへ逃がす（Starlette 共有スレッドプールが枯渇して /api/health まで止まるのを防ぐ）
+_io_pool = BlockingPool("api-io", int(os.getenv("API_IO_WORKERS", "16")))
+_backtest_pool = BlockingPool("api-backtest", int(os.getenv("API_BACKTEST_WORKERS", "4")))
 
 
 # ======================
@@ -161,7 +285,7 @@ _cached_at: dict[str, datetime] = {}
 # ======================
 
 @app.get("/api/health")
-def health():
+async def health():
     return {"status": "ok"}
 
 
@@ -170,12 +294,16 @@ def health():
 # ======================
 
 @app.get("/api/nav/sp500-synthetic", response_model=SyntheticNavResponse)
-def get_synthetic_nav():
-    return nav_service.get_synthetic_nav()
+async def get_synthetic_nav():
+    return await _io_pool.run(nav_service.get_synthetic_nav)
 
 
 @app.get("/api/nav/emaxis-slim-sp500", response_model=FundNavResponse)
-def get_fund_nav():
+async def get_fund_nav():
+    return await _io_pool.run(_official_or_synthetic_nav)
+
+
+def _official_or_synthetic_nav():
     nav = nav_service.get_official_nav()
     if nav:
         return nav
@@ -188,129 +316,381 @@ def get_fund_nav():
 
 
 # ======================
-# Snapshot Builder
+# Snapshot Components
 # ======================
 
-def _build_snapshot(index_type: IndexType = IndexType.SP500):
-    price_history = market_service.get_price_history(index_type=index_type.value)
-    market_service.get_current_price(price_history, index_type=index_type.value)
-    market_service.get_usd_jpy()
+# スナップショットは部品ごとに TTL を持つキャッシュに分け、レスポンスが読む部品だけを遅延構築する。
+#   prices（指数ごと）→ chart / technical（prices の版をキーに含めるので再取得後は作り直される）
+#   current_price（SP500 は基準価額、それ以外は prices の終値）、macro / events（全指数で共有）
+# 期限切れ後は直前の値を即返しつつ、部品ごとに1本だけ再構築する
+_prices_cache = SingleFlightCache(
+    ttl=timedelta(seconds=60), stale_while_revalidate=True, name="snapshot-prices"
+)
+_chart_cache = SingleFlightCache(
+    ttl=timedelta(hours=1), name="snapshot-chart", maxsize=len(IndexType) * 2
+)
+_nav_cache = SingleFlightCache(
+    ttl=timedelta(seconds=60), stale_while_revalidate=True, name="snapshot-nav"
+)
+_macro_cache = SingleFlightCache(
+    ttl=timedelta(seconds=float(os.getenv("SNAPSHOT_MACRO_TTL_SECONDS", "300"))),
+    stale_while_revalidate=True,
+    name="snapshot-macro",
+)
+_events_cache = SingleFlightCache(
+    ttl=timedelta(hours=1), stale_while_revalidate=True, name="snapshot-events", maxsize=2
+)
+
+# 外部取得はソースごとにタイムアウトを設ける（秒）
+_fetch_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("SNAPSHOT_FETCH_WORKERS", "16")),
+    thread_name_prefix="snapshot-fetch",
+)
+_fetch_timeouts = {
+    "price_history": 30.0,
+    "fund_nav": 20.0,
+    "macro": 30.0,
+}
+
+
+def _fetch_fund_nav():
+    return nav_service.get_official_nav() or nav_service.get_synthetic_nav()
+
+
+def _fetch_with_timeout(source: str, label: str, func, *args):
+    timeout = _fetch_timeouts[source]
+    try:
+        return _fetch_executor.submit(func, *args).result(timeout=timeout)
+    except FutureTimeoutError:
+        logger.warning("[SNAPSHOT] %s fetch for %s timed out after %.0fs", source, label, timeout)
+        raise
 
-    if index_type == IndexType.SP500:
-        fund_nav = nav_service.get_official_nav() or nav_service.get_synthetic_nav()
-        current_price = fund_nav["navJpy"]
-    else:
-        current_price = price_history[-1][1]
 
-    technical_score, technical_details = calculate_technical_score(price_history)
-    macro_data = macro_service.get_macro_series()
+def _build_prices(index_type: IndexType):
+    return _fetch_with_timeout(
+        "price_history", index_type.value, market_service.get_price_history, index_type.value
+    )
+
+
+def _build_chart(price_history) -> Dict:
+    price_columns = market_service.build_price_columns(price_history)
+    price_rows = price_series_formats.to_rows(price_columns)
+    return {
+        # レスポンス毎に dict を組み直して検証しないよう、モデル化は構築時の1回だけ
+        "price_series": [PricePoint(**row) for row in price_rows],
+        # price-history エンドポイントは形式ごとのバイト列をそのまま返す（ETag 付き）
+        "price_columns": price_columns,
+        "price_series_bodies": {
+            fmt: price_series_formats.encode(price_columns, fmt) for fmt in price_series_formats.FORMATS
+        },
+    }
+
+
+def _build_nav() -> float:
+    return _fetch_with_timeout("fund_nav", IndexType.SP500.value, _fetch_fund_nav)["navJpy"]
+
+
+def _build_macro() -> Dict:
+    macro_data = _fetch_with_timeout("macro", "macro", macro_service.get_macro_series)
     macro_score, macro_details = calculate_macro_score(
         macro_data["r_10y"], macro_data["cpi"], macro_data["vix"]
     )
+    return {"score": macro_score, "details": macro_details}
 
-    events = event_service.get_events()
-    event_adjustment, event_details = calculate_event_adjustment(date.today(), events)
 
-    total_score = calculate_total_score(technical_score, macro_score, event_adjustment)
-    label = get_label(total_score)
+def _build_events(today: date) -> Dict:
+    event_adjustment, event_details = calculate_event_adjustment(today, event_service.get_events())
+    return {"adjustment": event_adjustment, "details": event_details}
 
-    snapshot = {
-        "current_price": current_price,
-        "scores": {
-            "technical": technical_score,
-            "macro": macro_score,
-            "event_adjustment": event_adjustment,
-            "total": total_score,
-            "label": label,
-        },
-        "technical_details": technical_details,
-        "macro_details": macro_details,
-        "event_details": event_details,
-        "price_history": price_history,
-        "price_series": market_service.build_price_series_with_ma(price_history),
-    }
 
-    return snapshot
+# 部品は (cache, key, builder) で表し、同期・非同期どちらの経路からも同じように取得する
+def _prices_spec(index_type: IndexType):
+    return _prices_cache, index_type.value, lambda: _build_prices(index_type)
+
+
+def _chart_spec(index_type: IndexType, prices: CacheEntry):
+    return _chart_cache, (index_type.value, prices.version), lambda: _build_chart(prices.value)
+
+
+def _nav_spec():
+    return _nav_cache, IndexType.SP500.value, _build_nav
+
+
+def _macro_spec():
+    return _macro_cache, "macro", _build_macro
+
+
+def _events_spec():
+    today = date.today()
+    return _events_cache, today, lambda: _build_events(today)
+
+
+def get_component(spec) -> CacheEntry:
+    cache, key, builder = spec
+    return cache.get_entry(key, builder)
+
+
+async def get_component_async(spec) -> CacheEntry:
+    cache, key, builder = spec
+    entry = cache.get_entry_nowait(key, builder)
+    if entry is None:
+        # 初回（まだ何もキャッシュされていない）だけ構築を待つ
+        entry = await _io_pool.run(cache.get_entry, key, builder)
+    return entry
+
+
+def _price_specs(index_type: IndexType) -> List:
+    """Components behind ``current_price``: prices, plus the fund NAV for SP500."""
+
+    specs = [_prices_spec(index_type)]
+    if index_type == IndexType.SP500:
+        specs.append(_nav_spec())
+    return specs
+
+
+def _current_price(index_type: IndexType, prices: CacheEntry, nav: Optional[CacheEntry]) -> float:
+    if index_type == IndexType.SP500:
+        return nav.value
+    return prices.value[-1][1]
+
+
+# 更新時の部品構築は _fetch_executor とは別のプールで並行させる
+# （構築処理自体が _fetch_executor で取得を待つため、同じプールだと枯渇しうる）
+_refresh_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="snapshot-refresh")
+
+
+def _refresh_prices_and_chart(index_type: IndexType):
+    cache, cache_key, builder = _prices_spec(index_type)
+    cache.refresh(cache_key, builder)
+    # 新しい価格の版に対するチャート（シリアライズ済み本文）も先に作っておく
+    get_component(_chart_spec(index_type, get_component(_prices_spec(index_type))))
+
+
+def _refresh_snapshot(key: str):
+    index_type = IndexType(key)
+    futures = [_refresh_executor.submit(_refresh_prices_and_chart, index_type)]
+    shared_specs = [_macro_spec(), _events_spec()] + _price_specs(index_type)[1:]
+    futures += [_refresh_executor.submit(get_component, spec) for spec in shared_specs]
+    # 独立した部品は同時に構築し、全部そろうのを待ってから失敗を報告する
+    wait_futures(futures)
+    for future in futures:
+        future.result()
 
 
 # ======================
 # Price History Endpoints
 # ======================
 
+# 既定は毎回 ETag で再検証（変化が無ければ 304 で本文を送らない）
+_price_history_max_age = int(os.getenv("PRICE_HISTORY_MAX_AGE_SECONDS", "0"))
+_price_history_cache_control = f"public, max-age={_price_history_max_age}, must-revalidate"
+
+
+async def _price_history_response(
+    request: Request,
+    index_type: IndexType,
+    series_format: Optional[PriceSeriesFormat] = None,
+    since: Optional[date] = None,
+) -> Response:
+    prices = await get_component_async(_prices_spec(index_type))
+    chart = (await get_component_async(_chart_spec(index_type, prices))).value
+    fmt = price_series_formats.select_format(
+        series_format.value if series_format else None, request.headers.get("accept")
+    )
+    if since is None:
+        serialized: SerializedBody = chart["price_series_bodies"][fmt]
+    else:
+        # 差分モード: クライアントが持っている日付より後の点だけを返す
+        serialized = price_series_formats.encode(
+            price_series_formats.slice_since(chart["price_columns"], since), fmt
+        )
+    headers = {
+        "ETag": serialized.etag,
+        "Cache-Control": _price_history_cache_control,
+        "Vary": "Accept",
+    }
+    if serialized.matches(request.headers.get("if-none-match")):
+        return Response(status_code=304, headers=headers)
+    return Response(content=serialized.body, media_type=serialized.media_type, headers=headers)
+
+
 @app.get("/api/sp500/price-history", response_model=List[PricePoint])
-def get_sp500_history():
-    return get_cached_snapshot(IndexType.SP500)["price_series"]
+async def get_sp500_history(
+    request: Request,
+    series_format: Optional[PriceSeriesFormat] = Query(None, alias="format"),
+    since: Optional[date] = None,
+):
+    return await _price_history_response(request, IndexType.SP500, series_format, since)
 
 
 @app.get("/api/topix/price-history", response_model=List[PricePoint])
-def get_topix_history():
-    return get_cached_snapshot(IndexType.TOPIX)["price_series"]
+async def get_topix_history(
+    request: Request,
+    series_format: Optional[PriceSeriesFormat] = Query(None, alias="format"),
+    since: Optional[date] = None,
+):
+    return await _price_history_response(request, IndexType.TOPIX, series_format, since)
 
 
 @app.get("/api/nikkei/price-history", response_model=List[PricePoint])
-def get_nikkei_history():
-    return get_cached_snapshot(IndexType.NIKKEI)["price_series"]
+async def get_nikkei_history(
+    request: Request,
+    series_format: Optional[PriceSeriesFormat] = Query(None, alias="format"),
+    since: Optional[date] = None,
+):
+    return await _price_history_response(request, IndexType.NIKKEI, series_format, since)
 
 
 @app.get("/api/nifty50/price-history", response_model=List[PricePoint])
-def get_nifty_history():
-    return get_cached_snapshot(IndexType.NIFTY50)["price_series"]
+async def get_nifty_history(
+    request: Request,
+    series_format: Optional[PriceSeriesFormat] = Query(None, alias="format"),
+    since: Optional[date] = None,
+):
+    return await _price_history_response(request, IndexType.NIFTY50, series_format, since)
 
 
 @app.get("/api/orukan/price-history", response_model=List[PricePoint])
-def get_orukan_history():
-    return get_cached_snapshot(IndexType.ORUKAN)["price_series"]
+async def get_orukan_history(
+    request: Request,
+    series_format: Optional[PriceSeriesFormat] = Query(None, alias="format"),
+    since: Optional[date] = None,
+):
+    return await _price_history_response(request, IndexType.ORUKAN, series_format, since)
 
 
 @app.get("/api/orukan-jpy/price-history", response_model=List[PricePoint])
-def get_orukan_jpy_history():
-    return get_cached_snapshot(IndexType.ORUKAN_JPY)["price_series"]
+async def get_orukan_jpy_history(
+    request: Request,
+    series_format: Optional[PriceSeriesFormat] = Query(None, alias="format"),
+    since: Optional[date] = None,
+):
+    return await _price_history_response(request, IndexType.ORUKAN_JPY, series_format, since)
 
 
 @app.get("/api/sp500-jpy/price-history", response_model=List[PricePoint])
-def get_sp500_jpy_history():
-    return get_cached_snapshot(IndexType.SP500_JPY)["price_series"]
+async def get_sp500_jpy_history(
+    request: Request,
+    series_format: Optional[PriceSeriesFormat] = Query(None, alias="format"),
+    since: Optional[date] = None,
+):
+    return await _price_history_response(request, IndexType.SP500_JPY, series_format, since)
+
+
+# ======================
+# Quote Endpoint
+# ======================
+
+# 日中の現在値はスナップショット（日次履歴）とは別レイヤーで、短い TTL でキャッシュする
+@app.get("/api/quote", response_model=QuoteResponse)
+async def get_quote(index_type: IndexType = IndexType.SP500):
+    quote = await _io_pool.run(market_service.get_quote, index_type.value)
+    return {"index_type": index_type, **quote}
 
 
 # ======================
-# Cache Handler
+# Background Refresher
 # ======================
 
-def get_cached_snapshot(index_type: IndexType = IndexType.SP500):
-    now = datetime.utcnow()
-    key = index_type.value
+# 有効にすると TTL(60秒) より短い間隔で全指数を再構築し、リクエスト経路はメモリ参照だけにする。
+# アクセスが無くても外部ソースを叩き続けるため既定は無効（0）で、必要な環境でだけ設定する
+_refresh_interval = float(os.getenv("SNAPSHOT_REFRESH_INTERVAL_SECONDS", "0"))
+_refresh_jitter = float(os.getenv("SNAPSHOT_REFRESH_JITTER_SECONDS", "10"))
+
+snapshot_refresher: Optional[SnapshotRefresher] = None
+if _refresh_interval > 0:
+    snapshot_refresher = SnapshotRefresher(
+        keys=[index_type.value for index_type in IndexType],
+        refresh=_refresh_snapshot,
+        interval=timedelta(seconds=_refresh_interval),
+        jitter=timedelta(seconds=_refresh_jitter),
+        # 同じ周期で更新する指数の価格履歴は1回の一括ダウンロードで取得する
+        before_batch=market_service.warm_price_histories,
+        max_workers=int(os.getenv("SNAPSHOT_REFRESH_WORKERS", "4")),
+    )
 
-    if key in _cached_snapshot and now - _cached_at.get(key, datetime.min) < _cache_ttl:
-        return _cached_snapshot[key]
 
-    _cached_snapshot[key] = _build_snapshot(index_type)
-    _cached_at[key] = now
-    return _cached_snapshot[key]
+@app.get("/api/snapshots/status")
+async def snapshot_status():
+    return {
+        "refresher_enabled": snapshot_refresher is not None,
+        "indexes": snapshot_refresher.status() if snapshot_refresher else {},
+    }
 
 
 # ======================
 # Evaluate Endpoints
 # ======================
 
-def _evaluate(position: PositionRequest):
-    snapshot = get_cached_snapshot(position.index_type)
-    current_price = snapshot["current_price"]
+# 価格履歴は再取得まで不変なので、score_ma ごとのテクニカルスコアは版ごとに1回だけ計算する。
+# キーに版を含めるため、再取得後は古い結果が参照されず LRU で押し出される。
+_technical_memo: SingleFlightCache = SingleFlightCache(
+    ttl=timedelta(hours=1),
+    name="technical-memo",
+    maxsize=len(IndexType) * 8,
+)
 
-    technical_score, technical_details = calculate_technical_score(
-        snapshot["price_history"], base_window=position.score_ma
+
+def _technical_score_for(index_type: IndexType, score_ma: int, prices: CacheEntry):
+    return _technical_memo.get(
+        (index_type.value, score_ma, prices.version),
+        lambda: calculate_technical_score(prices.value, base_window=score_ma),
     )
-    macro_score = snapshot["scores"]["macro"]
-    event_adjustment = snapshot["scores"]["event_adjustment"]
+
+
+async def _technical_score_async(index_type: IndexType, score_ma: int, prices: CacheEntry):
+    memo = _technical_memo.peek((index_type.value, score_ma, prices.version))
+    if memo is not None:
+        return memo.value
+    return await _io_pool.run(_technical_score_for, index_type, score_ma, prices)
+
+
+async def _evaluate(
+    position: PositionRequest,
+    include_series: bool = True,
+    series_from: Optional[date] = None,
+    series_to: Optional[date] = None,
+):
+    index_type = position.index_type
+    macro, events, prices, *nav = await asyncio.gather(
+        get_component_async(_macro_spec()),
+        get_component_async(_events_spec()),
+        *(get_component_async(spec) for spec in _price_specs(index_type)),
+    )
+    technical = await _technical_score_async(index_type, position.score_ma, prices)
+    current_price = _current_price(index_type, prices, nav[0] if nav else None)
+
+    price_series = None
+    if include_series:
+        chart = (await get_component_async(_chart_spec(index_type, prices))).value
+        price_series = _price_series_window(chart, series_from, series_to)
+
+    return {
+        **_position_result(position, current_price, technical, macro.value, events.value),
+        "technical_details": technical[1],
+        "macro_details": macro.value["details"],
+        "event_details": events.value["details"],
+        "price_series": price_series,
+    }
+
+
+def _position_result(
+    position: PositionRequest, current_price: float, technical, macro: Dict, events: Dict
+) -> Dict:
+    technical_score, _ = technical
+    macro_score = macro["score"]
+    event_adjustment = events["adjustment"]
     total_score = calculate_total_score(technical_score, macro_score, event_adjustment)
     label = get_label(total_score)
 
-    market_value = position.total_quantity * current_price
-    unrealized_pnl = market_value - (position.total_quantity * position.avg_cost)
+    # 評価額・取得額を先に丸め、損益は丸めた値の差にする（合計が常に整合するように）
+    market_value = round(position.total_quantity * current_price, 2)
+    cost_basis = round(position.total_quantity * position.avg_cost, 2)
 
     return {
         "current_price": current_price,
-        "market_value": round(market_value, 2),
-        "unrealized_pnl": round(unrealized_pnl, 2),
+        "market_value": market_value,
+        "unrealized_pnl": round(market_value - cost_basis, 2),
         "scores": {
             "technical": technical_score,
             "macro": macro_score,
@@ -318,21 +698,100 @@ def _evaluate(position: PositionRequest):
             "total": total_score,
             "label": label,
         },
-        "technical_details": technical_details,
-        "macro_details": snapshot["macro_details"],
-        "event_details": snapshot["event_details"],
-        "price_series": snapshot["price_series"],
     }
 
 
+def _price_series_window(chart: Dict, series_from: Optional[date], series_to: Optional[date]):
+    if series_from is None and series_to is None:
+        return chart["price_series"]
+    window = price_series_formats.date_window(chart["price_columns"]["date"], series_from, series_to)
+    return chart["price_series"][window]
+
+
+# include_series=false でスコアと損益だけを返す（チャートは price-history 側で取得する）
 @app.post("/api/sp500/evaluate", response_model=EvaluateResponse)
-def evaluate_sp500(position: PositionRequest):
-    return _evaluate(position)
+async def evaluate_sp500(
+    position: PositionRequest,
+    include_series: bool = True,
+    series_from: Optional[date] = Query(None, alias="from"),
+    series_to: Optional[date] = Query(None, alias="to"),
+):
+    return await _evaluate(position, include_series, series_from, series_to)
 
 
 @app.post("/api/evaluate", response_model=EvaluateResponse)
-def evaluate(position: PositionRequest):
-    return _evaluate(position)
+async def evaluate(
+    position: PositionRequest,
+    include_series: bool = True,
+    series_from: Optional[date] = Query(None, alias="from"),
+    series_to: Optional[date] = Query(None, alias="to"),
+):
+    return await _evaluate(position, include_series, series_from, series_to)
+
+
+# 複数ポジションを一括評価する。価格・現在値は指数ごと、テクニカルスコアは
+# (指数, score_ma) ごとに1回だけ参照し、チャート系列は含めない。
+@app.post("/api/evaluate/batch", response_model=BatchEvaluateResponse)
+async def evaluate_batch(payload: BatchEvaluateRequest):
+    index_types = list(dict.fromkeys(position.index_type for position in payload.positions))
+    needs_nav = IndexType.SP500 in index_types
+    macro, events, *entries = await asyncio.gather(
+        get_component_async(_macro_spec()),
+        get_component_async(_events_spec()),
+        *([get_component_async(_nav_spec())] if needs_nav else []),
+        *(get_component_async(_prices_spec(index_type)) for index_type in index_types),
+    )
+    nav = entries.pop(0) if needs_nav else None
+    prices: Dict[IndexType, CacheEntry] = dict(zip(index_types, entries))
+    current_prices = {i: _current_price(i, prices[i], nav) for i in index_types}
+    technicals: Dict[tuple, tuple] = {}
+    results = []
+    for position in payload.positions:
+        group = (position.index_type, position.score_ma)
+        if group not in technicals:
+            try:
+                technicals[group] = await _technical_score_async(
+                    position.index_type, position.score_ma, prices[position.index_type]
+                )
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=f"{position.index_type.value}: {e}")
+        results.append(
+            {
+                "index_type": position.index_type,
+                "score_ma": position.score_ma,
+                "currency": INDEX_CURRENCY[position.index_type],
+                **_position_result(
+                    position,
+                    current_prices[position.index_type],
+                    technicals[group],
+                    macro.value,
+                    events.value,
+                ),
+            }
+        )
+
+    # 通貨の異なる評価額は合算しない
+    sums: Dict[str, List[float]] = {}
+    for position, result in zip(payload.positions, results):
+        market_value, cost_basis = sums.setdefault(result["currency"], [0.0, 0.0])
+        sums[result["currency"]] = [
+            market_value + result["market_value"],
+            cost_basis + round(position.total_quantity * position.avg_cost, 2),
+        ]
+    totals = [
+        {
+            "currency": currency,
+            "market_value": round(market_value, 2),
+            "cost_basis": round(cost_basis, 2),
+            "unrealized_pnl": round(market_value - cost_basis, 2),
+        }
+        for currency, (market_value, cost_basis) in sums.items()
+    ]
+    return {
+        "positions": results,
+        "totals": totals,
+        "total": totals[0] if len(totals) == 1 else None,
+    }
 
 
 # ======================
@@ -340,9 +799,10 @@ def evaluate(position: PositionRequest):
 # ======================
 
 @app.post("/api/backtest", response_model=BacktestResponse)
-def backtest(payload: BacktestRequest):
+async def backtest(payload: BacktestRequest):
     try:
-        return backtest_service.run_backtest(
+        return await _backtest_pool.run(
+            backtest_service.run_backtest,
             payload.start_date,
             payload.end_date,
             payload.initial_cash,
@@ -360,6 +820,50 @@ def backtest(payload: BacktestRequest):
         )
 
 
+@app.post("/api/backtest/compare", response_model=Dict[str, BacktestResponse])
+async def backtest_compare(payload: BacktestCompareRequest):
+    try:
+        return await _backtest_pool.run(
+            backtest_service.run_multi_index,
+            payload.start_date,
+            payload.end_date,
+            payload.initial_cash,
+            [index_type.value for index_type in payload.index_types],
+            payload.buy_threshold,
+            payload.sell_threshold,
+            payload.score_ma,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception:
+        raise HTTPException(
+            status_code=502,
+            detail="Backtest failed: external data unavailable.",
+        )
+
+
+@app.post("/api/backtest/sweep", response_model=BacktestSweepResponse)
+async def backtest_sweep(payload: BacktestSweepRequest):
+    try:
+        return await _backtest_pool.run(
+            backtest_service.run_sweep,
+            payload.start_date,
+            payload.end_date,
+            payload.initial_cash,
+            payload.buy_thresholds,
+            payload.sell_thresholds,
+            payload.index_type.value,
+            payload.score_mas,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception:
+        raise HTTPException(
+            status_code=502,
+            detail="Backtest failed: external data unavailable.",
+        )
+
+
 # ======================
 # Standalone Run
 # ======================
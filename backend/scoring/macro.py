@@ -1,3 +1,5 @@
+from bisect import bisect_left
+from datetime import date
 from typing import Dict, List, Tuple
 
 
@@ -7,6 +9,17 @@ def percentile_rank(series: List[float], current: float) -> float:
     return count / len(sorted_series)
 
 
+def _combine_percentiles(p_r: float, p_cpi: float, p_vix: float) -> Tuple[float, Dict]:
+    m_score = 100 * (0.4 * p_r + 0.3 * p_cpi + 0.3 * p_vix)
+
+    return round(m_score, 2), {
+        "p_r": round(p_r, 3),
+        "p_cpi": round(p_cpi, 3),
+        "p_vix": round(p_vix, 3),
+        "M": round(m_score, 2),
+    }
+
+
 def calculate_macro_score(
     r_10y: Tuple[List[float], float], cpi: Tuple[List[float], float], vix: Tuple[List[float], float]
 ) -> Tuple[float, Dict]:
@@ -18,11 +31,69 @@ def calculate_macro_score(
     p_cpi = percentile_rank(cpi_history, cpi_current)
     p_vix = percentile_rank(vix_history, vix_current)
 
-    m_score = 100 * (0.4 * p_r + 0.3 * p_cpi + 0.3 * p_vix)
+    return _combine_percentiles(p_r, p_cpi, p_vix)
 
-    return round(m_score, 2), {
-        "p_r": round(p_r, 3),
-        "p_cpi": round(p_cpi, 3),
-        "p_vix": round(p_vix, 3),
-        "M": round(m_score, 2),
-    }
+
+class RunningPercentile:
+    """Percentile of the latest observation of a dated series as the date moves forward.
+
+    Values are rank-compressed up front and counted in a Fenwick tree, so each
+    ``advance_to`` / ``percentile`` step costs O(log n).  At any date the
+    observations dated on or before it are split into history (all but the
+    last) and current (the last), exactly like slicing the series and calling
+    ``percentile_rank``.  Dates passed to ``advance_to`` must not go backwards.
+    """
+
+    def __init__(self, series: List[Tuple[date, float]]):
+        self._points = sorted(series, key=lambda p: p[0])
+        self._ranks = sorted(set(v for _, v in self._points))
+        self._tree = [0] * (len(self._ranks) + 1)
+        self._consumed = 0
+        self._latest = None
+
+    def _add(self, value: float) -> None:
+        i = bisect_left(self._ranks, value) + 1
+        while i < len(self._tree):
+            self._tree[i] += 1
+            i += i & -i
+
+    def _count_below(self, value: float) -> int:
+        i = bisect_left(self._ranks, value)
+        count = 0
+        while i > 0:
+            count += self._tree[i]
+            i -= i & -i
+        return count
+
+    def advance_to(self, current: date) -> None:
+        while self._consumed < len(self._points) and self._points[self._consumed][0] <= current:
+            if self._latest is not None:
+                self._add(self._latest)
+            self._latest = self._points[self._consumed][1]
+            self._consumed += 1
+
+    def percentile(self) -> float:
+        if self._latest is None:
+            raise ValueError("No macro data available for requested date")
+        if self._consumed == 1:
+            # 履歴が1件のときは同値を履歴とみなす（percentile=0）
+            return 0.0
+        return self._count_below(self._latest) / (self._consumed - 1)
+
+
+class MacroPercentileEngine:
+    """Day-by-day ``calculate_macro_score`` over dated r_10y / cpi / vix series."""
+
+    def __init__(self, macro_series: Dict[str, List[Tuple[date, float]]]):
+        self._trackers = {
+            name: RunningPercentile(macro_series[name]) for name in ("r_10y", "cpi", "vix")
+        }
+
+    def score_at(self, current: date) -> Tuple[float, Dict]:
+        for tracker in self._trackers.values():
+            tracker.advance_to(current)
+        return _combine_percentiles(
+            self._trackers["r_10y"].percentile(),
+            self._trackers["cpi"].percentile(),
+            self._trackers["vix"].percentile(),
+        )
@@ -1,4 +1,8 @@
-from typing import List, Tuple
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from domain.price_series import as_price_series, rolling_mean
 
 
 def moving_average(prices: List[float], window: int) -> List[float]:
@@ -15,43 +19,26 @@ def clip(value: float, lower: float = 0.0, upper: float = 100.0) -> float:
     return max(lower, min(upper, value))
 
 
-def calculate_technical_score(price_history: List[Tuple[str, float]], base_window: int = 200):
-    closes = [p[1] for p in price_history]
+def score_windows(base_window: int) -> List[int]:
+    """MA windows needed to score with ``base_window`` (ordered short/mid/long)."""
+    return sorted(set([20, 60, 200, base_window]))
 
-    # Calculate every MA we rely on so we never reference an undefined variable
-    windows = sorted(set([20, 60, 200, base_window]))
-    ma_series = {window: moving_average(closes, window) for window in windows}
 
-    def latest_ma(window: int) -> float:
-        return ma_series[window][-1]
-
-    ma_base = latest_ma(base_window)
-    current_price = closes[-1]
+def base_score(d: float) -> float:
+    if d <= -20:
+        return 0
+    if -20 < d < 0:
+        return 30 * (d + 20) / 20
+    if 0 <= d < 10:
+        return 30 + 20 * d / 10
+    if 10 <= d < 25:
+        return 50 + 30 * (d - 10) / 15
+    return 100
 
-    # Align the trend check with the ordered MA set (short/mid/long)
-    short_window, mid_window, long_window = windows[0], windows[1], windows[-1]
-    ma_short_series = ma_series[short_window]
-    ma_mid_series = ma_series[mid_window]
-    ma_long_series = ma_series[long_window]
-    ma_short = ma_short_series[-1]
-    ma_mid = ma_mid_series[-1]
-    ma_long = ma_long_series[-1]
 
-    d = (current_price - ma_base) / ma_base * 100
+def trend_score(ma_short: float, ma_mid: float, ma_long: float, ma_short_recent: List[float]) -> int:
+    """+10 / -10 / 0 depending on MA ordering and the last 20 short-MA values."""
 
-    # base score
-    if d <= -20:
-        t_base = 0
-    elif -20 < d < 0:
-        t_base = 30 * (d + 20) / 20
-    elif 0 <= d < 10:
-        t_base = 30 + 20 * d / 10
-    elif 10 <= d < 25:
-        t_base = 50 + 30 * (d - 10) / 15
-    else:
-        t_base = 100
-
-    # trend evaluation
     def is_increasing(series: List[float]) -> bool:
         if len(series) < 20:
             return False
@@ -62,13 +49,25 @@ def calculate_technical_score(price_history: List[Tuple[str, float]], base_windo
             return False
         return series[-1] < series[-20]
 
-    if ma_short > ma_mid > ma_long and is_increasing(ma_short_series[-20:]):
-        t_trend = 10
-    elif ma_short < ma_mid < ma_long and is_decreasing(ma_short_series[-20:]):
-        t_trend = -10
-    else:
-        t_trend = 0
-
+    if ma_short > ma_mid > ma_long and is_increasing(ma_short_recent):
+        return 10
+    if ma_short < ma_mid < ma_long and is_decreasing(ma_short_recent):
+        return -10
+    return 0
+
+
+def _score_from_mas(
+    current_price: float,
+    ma_base: float,
+    ma_short: float,
+    ma_mid: float,
+    ma_long: float,
+    ma_short_recent: List[float],
+    base_window: int,
+) -> Tuple[float, Dict]:
+    d = (current_price - ma_base) / ma_base * 100
+    t_base = base_score(d)
+    t_trend = trend_score(ma_short, ma_mid, ma_long, ma_short_recent)
     technical_score = clip(t_base + t_trend)
 
     return round(technical_score, 2), {
@@ -78,3 +77,133 @@ def calculate_technical_score(price_history: List[Tuple[str, float]], base_windo
         "base_window": base_window,
         "ma_base": round(ma_base, 2),
     }
+
+
+def calculate_technical_score(price_history, base_window: int = 200):
+    """Score the latest date of ``price_history`` (a ``PriceSeries`` or legacy tuple list)."""
+
+    series = as_price_series(price_history)
+    closes = series.closes
+
+    # Calculate every MA we rely on so we never reference an undefined variable
+    windows = score_windows(base_window)
+    for window in windows:
+        if len(closes) < window:
+            raise ValueError(f"Not enough data for MA{window}")
+    # スナップショットの PriceSeries ならチャート用 MA と同じ計算結果を使い回す
+    ma_series = {window: series.moving_average(window) for window in windows}
+
+    # Align the trend check with the ordered MA set (short/mid/long)
+    short_window, mid_window, long_window = windows[0], windows[1], windows[-1]
+    ma_short_series = ma_series[short_window][short_window - 1 :]
+
+    return _score_from_mas(
+        float(closes[-1]),
+        float(ma_series[base_window][-1]),
+        float(ma_short_series[-1]),
+        float(ma_series[mid_window][-1]),
+        float(ma_series[long_window][-1]),
+        ma_short_series[-20:].tolist(),
+        base_window,
+    )
+
+
+class TechnicalScoreEngine:
+    """Day-by-day technical scoring for a price series that only grows forward.
+
+    ``push`` one close per day and call ``score`` to get the same result as
+    ``calculate_technical_score`` on the whole history so far, without
+    rebuilding every MA series each day.  Each new MA value is summed over its
+    own window in the same order as ``moving_average`` so results stay
+    bit-identical (an add/subtract running sum drifts and can flip MA ties).
+    """
+
+    def __init__(self, base_window: int = 200):
+        self.base_window = base_window
+        self.windows = score_windows(base_window)
+        self._closes: List[float] = []
+        self._latest_ma: Dict[int, float] = {}
+        self._short_recent: List[float] = []
+
+    @property
+    def ready(self) -> bool:
+        return len(self._closes) >= self.windows[-1]
+
+    def push(self, close: float) -> None:
+        self._closes.append(close)
+        count = len(self._closes)
+        for window in self.windows:
+            if count >= window:
+                self._latest_ma[window] = sum(self._closes[count - window :]) / window
+
+        short_window = self.windows[0]
+        if count >= short_window:
+            self._short_recent.append(self._latest_ma[short_window])
+            if len(self._short_recent) > 20:
+                del self._short_recent[0]
+
+    def score(self) -> Tuple[float, Dict]:
+        if not self.ready:
+            raise ValueError(f"Not enough data for MA{self.windows[-1]}")
+        short_window, mid_window, long_window = self.windows[0], self.windows[1], self.windows[-1]
+        return _score_from_mas(
+            self._closes[-1],
+            self._latest_ma[self.base_window],
+            self._latest_ma[short_window],
+            self._latest_ma[mid_window],
+            self._latest_ma[long_window],
+            self._short_recent,
+            self.base_window,
+        )
+
+
+def _round_array(values: np.ndarray, digits: int = 2) -> np.ndarray:
+    # builtin round() is correctly rounded; np.round can differ on near-half values
+    return np.array([round(v, digits) for v in values.tolist()], dtype=float)
+
+
+def calculate_technical_score_series(
+    closes: Sequence[float], base_window: int = 200
+) -> Dict[str, np.ndarray]:
+    """Technical score for every date of ``closes`` in one pass.
+
+    Returns ``score``, ``d``, ``T_base``, ``T_trend`` and ``ma_base`` arrays
+    aligned to ``closes``; element ``i`` equals ``calculate_technical_score``
+    on ``closes[: i + 1]`` and is NaN while the longest MA is not yet filled.
+    """
+
+    prices = np.asarray(closes, dtype=float)
+    windows = score_windows(base_window)
+    ma_series = {window: rolling_mean(prices, window) for window in windows}
+
+    ma_base = ma_series[base_window]
+    ma_short, ma_mid, ma_long = ma_series[windows[0]], ma_series[windows[1]], ma_series[windows[-1]]
+
+    with np.errstate(invalid="ignore"):
+        d = (prices - ma_base) / ma_base * 100
+        t_base = np.select(
+            [d <= -20, (-20 < d) & (d < 0), (0 <= d) & (d < 10), (10 <= d) & (d < 25)],
+            [0.0, 30 * (d + 20) / 20, 30 + 20 * d / 10, 50 + 30 * (d - 10) / 15],
+            default=100.0,
+        )
+
+        # short MA 19 営業日前との比較（NaN との比較は False になり未成熟期間を除外する）
+        ma_short_prev = np.full(len(prices), np.nan)
+        if len(prices) > 19:
+            ma_short_prev[19:] = ma_short[:-19]
+        rising = (ma_short > ma_mid) & (ma_mid > ma_long) & (ma_short > ma_short_prev)
+        falling = (ma_short < ma_mid) & (ma_mid < ma_long) & (ma_short < ma_short_prev)
+    t_trend = np.where(rising, 10.0, np.where(falling, -10.0, 0.0))
+
+    score = np.clip(t_base + t_trend, 0.0, 100.0)
+    immature = np.isnan(ma_long)
+    for column in (score, d, t_base, t_trend, ma_base):
+        column[immature] = np.nan
+
+    return {
+        "score": _round_array(score),
+        "d": _round_array(d),
+        "T_base": _round_array(t_base),
+        "T_trend": _round_array(t_trend),
+        "ma_base": _round_array(ma_base),
+    }
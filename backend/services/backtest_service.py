@@ -1,17 +1,218 @@
 from __future__ import annotations
 
+from concurrent.futures import ProcessPoolExecutor
 from datetime import date
 from math import floor
-from typing import Dict, List, Tuple
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
 
 import logging
+import multiprocessing
 import os
+import threading
+from domain.price_series import PriceSeries, as_price_series
 from scoring.events import calculate_event_adjustment
-from scoring.macro import calculate_macro_score
-from scoring.technical import calculate_technical_score
+from scoring.macro import MacroPercentileEngine
+from scoring.technical import TechnicalScoreEngine
 from scoring.total_score import calculate_total_score
 
 
+# 1回のスイープで評価する組み合わせ数の上限（リクエスト1件で CPU を占有しすぎないため）
+MAX_SWEEP_COMBINATIONS = 5000
+
+
+# ----------------------------------------------------------------------
+# CPU-only steps. Module-level so they can be shipped to worker processes.
+# ----------------------------------------------------------------------
+
+def _first_scored_index(score_ma: int) -> int:
+    return max(score_ma - 1, 199)
+
+
+def _compute_max_drawdown(values: List[float]) -> float:
+    peak = values[0]
+    max_dd = 0.0
+    for v in values:
+        if v > peak:
+            peak = v
+        dd = (peak - v) / peak if peak != 0 else 0
+        if dd > max_dd:
+            max_dd = dd
+    return round(max_dd * 100, 2)
+
+
+def _event_calendar(
+    event_service, histories: Sequence[PriceSeries], first_idx: int
+) -> Dict[date, List[Dict]]:
+    """スコア対象日のイベント一覧。バッチごとに1回だけ引き、各ジョブへはこの表だけを渡す。"""
+
+    calendar: Dict[date, List[Dict]] = {}
+    for price_history in histories:
+        for current_dt in price_history.date_values()[first_idx:]:
+            if current_dt not in calendar:
+                calendar[current_dt] = event_service.get_events_for_date(current_dt)
+    return calendar
+
+
+def _macro_event_scores(
+    price_history: PriceSeries,
+    macro_series: Dict[str, List[Tuple[date, float]]],
+    event_calendar: Dict[date, List[Dict]],
+    first_idx: int,
+) -> List[Optional[Tuple[float, float]]]:
+    """日付ごとの (macro_score, event_adjustment)。score_ma に依存しないので使い回せる。"""
+
+    macro_engine = MacroPercentileEngine(macro_series)
+    components: List[Optional[Tuple[float, float]]] = [None] * len(price_history)
+    dates = price_history.date_values()
+    for idx in range(first_idx, len(price_history)):
+        current_dt = dates[idx]
+        macro_score, _ = macro_engine.score_at(current_dt)
+        event_adjustment, _ = calculate_event_adjustment(current_dt, event_calendar[current_dt])
+        components[idx] = (macro_score, event_adjustment)
+    return components
+
+
+def _score_series(
+    price_history: PriceSeries,
+    macro_event_scores: List[Optional[Tuple[float, float]]],
+    score_ma: int,
+) -> List[Optional[float]]:
+    # MA は日ごとに作り直さず、エンジンに1日ずつ積み上げて算出する
+    technical_engine = TechnicalScoreEngine(base_window=score_ma)
+    first_idx = _first_scored_index(score_ma)
+    scores: List[Optional[float]] = [None] * len(price_history)
+    for idx, (_, close) in enumerate(price_history):
+        technical_engine.push(close)
+        if idx >= first_idx:
+            technical_score, _ = technical_engine.score()
+            macro_score, event_adjustment = macro_event_scores[idx]
+            scores[idx] = calculate_total_score(technical_score, macro_score, event_adjustment)
+    return scores
+
+
+def _simulate(
+    price_history: PriceSeries,
+    scores: List[Optional[float]],
+    initial_cash: float,
+    buy_threshold: float,
+    sell_threshold: float,
+    include_history: bool = True,
+) -> Dict:
+    cash = initial_cash
+    shares = 0
+    portfolio_values: List[float] = []
+    portfolio_history: List[Dict] = []
+    trades: List[Dict] = []
+
+    hold_cash = initial_cash
+    hold_shares = 0
+    first_price = price_history[0][1]
+    hold_shares = floor(hold_cash / first_price)
+    hold_cash -= hold_shares * first_price
+    buy_hold_history: List[Dict] = []
+
+    for (date_str, close), score in zip(price_history, scores):
+        if score is not None:
+            if shares > 0 and score >= sell_threshold:
+                cash += shares * close
+                trades.append(
+                    {"action": "SELL", "date": date_str, "quantity": shares, "price": close}
+                )
+                shares = 0
+            elif shares == 0 and score < buy_threshold:
+                qty = floor(cash / close)
+                if qty > 0:
+                    cash -= qty * close
+                    shares += qty
+                    trades.append(
+                        {"action": "BUY", "date": date_str, "quantity": qty, "price": close}
+                    )
+
+        portfolio_value = round(cash + shares * close, 2)
+        portfolio_values.append(portfolio_value)
+
+        if include_history:
+            portfolio_history.append({"date": date_str, "value": portfolio_value})
+            hold_value = hold_cash + hold_shares * close
+            buy_hold_history.append({"date": date_str, "value": round(hold_value, 2)})
+
+    final_price = price_history[-1][1]
+    final_value = cash + shares * final_price
+    buy_hold_final = hold_cash + hold_shares * final_price
+
+    total_return = (final_value / initial_cash) - 1 if initial_cash else 0
+    days = (price_history.dates[-1] - price_history.dates[0]).item().days
+    years = days / 365.0 if days > 0 else 1
+    cagr = (final_value / initial_cash) ** (1 / years) - 1 if initial_cash else 0
+
+    max_dd = _compute_max_drawdown(portfolio_values)
+
+    result = {
+        "final_value": round(final_value, 2),
+        "buy_and_hold_final": round(buy_hold_final, 2),
+        "total_return_pct": round(total_return * 100, 2),
+        "cagr_pct": round(cagr * 100, 2),
+        "max_drawdown_pct": max_dd,
+        "trade_count": len(trades),
+    }
+    if include_history:
+        result.update(
+            {
+                "trades": trades,
+                "portfolio_history": portfolio_history,
+                "buy_hold_history": buy_hold_history,
+            }
+        )
+    return result
+
+
+def _backtest_job(
+    price_history: PriceSeries,
+    macro_series: Dict[str, List[Tuple[date, float]]],
+    event_calendar: Dict[date, List[Dict]],
+    initial_cash: float,
+    buy_threshold: float,
+    sell_threshold: float,
+    score_ma: int,
+) -> Dict:
+    macro_event_scores = _macro_event_scores(
+        price_history, macro_series, event_calendar, _first_scored_index(score_ma)
+    )
+    scores = _score_series(price_history, macro_event_scores, score_ma)
+    return _simulate(price_history, scores, initial_cash, buy_threshold, sell_threshold)
+
+
+def _sweep_job(
+    price_history: PriceSeries,
+    macro_event_scores: List[Optional[Tuple[float, float]]],
+    score_ma: int,
+    initial_cash: float,
+    buy_values: List[float],
+    sell_values: List[float],
+) -> List[Dict]:
+    scores = _score_series(price_history, macro_event_scores, score_ma)
+    rows: List[Dict] = []
+    for buy_threshold in buy_values:
+        for sell_threshold in sell_values:
+            summary = _simulate(
+                price_history,
+                scores,
+                initial_cash,
+                buy_threshold,
+                sell_threshold,
+                include_history=False,
+            )
+            rows.append(
+                {
+                    "buy_threshold": buy_threshold,
+                    "sell_threshold": sell_threshold,
+                    "score_ma": score_ma,
+                    **summary,
+                }
+            )
+    return rows
+
+
 class BacktestService:
     def __init__(self, market_service, macro_service, event_service):
         self.market_service = market_service
@@ -24,56 +225,70 @@ class BacktestService:
             "yes",
             "on",
         }
+        # 独立した複数ランをプロセスプールで並列実行する（0/1 はシリアル実行）
+        try:
+            self.max_workers = max(0, int(os.getenv("BACKTEST_MAX_WORKERS", "0")))
+        except ValueError:
+            self.max_workers = 0
+        # プールはリクエストごとに作らず、初回の並列実行時に作って使い回す
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
         logging.getLogger(__name__).info(
-            "[BACKTEST CONFIG] BACKTEST_ALLOW_FALLBACK=%s", self.allow_fallback
+            "[BACKTEST CONFIG] BACKTEST_ALLOW_FALLBACK=%s BACKTEST_MAX_WORKERS=%s",
+            self.allow_fallback,
+            self.max_workers,
         )
 
-    def _history_and_current(self, series: List[Tuple[date, float]], current: date):
-        usable = [(d, v) for d, v in series if d <= current]
-        if not usable:
-            raise ValueError("No macro data available for requested date")
+    def _process_pool(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                # サーバは多数のスレッドを抱えているので fork せず spawn で起動する
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._pool
 
-        values = [v for _, v in usable]
-        if len(values) == 1:
-            # percentile計算を安定させるため、履歴が1件のときは同値を追加
-            values.append(values[0])
-        history = values[:-1]
-        current_val = values[-1]
-        return history, current_val
+    def shutdown(self) -> None:
+        """Stop the shared worker processes (called from the app lifespan)."""
 
-    def _calculate_scores(
-        self,
-        price_history: List[Tuple[str, float]],
-        macro_series: Dict[str, List[Tuple[date, float]]],
-        current_date: date,
-        score_ma: int,
-    ):
-        technical_score, _ = calculate_technical_score(price_history, base_window=score_ma)
-
-        r_hist, r_cur = self._history_and_current(macro_series["r_10y"], current_date)
-        cpi_hist, cpi_cur = self._history_and_current(macro_series["cpi"], current_date)
-        vix_hist, vix_cur = self._history_and_current(macro_series["vix"], current_date)
-
-        macro_score, _ = calculate_macro_score(
-            (r_hist, r_cur), (cpi_hist, cpi_cur), (vix_hist, vix_cur)
-        )
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def _map_jobs(self, func: Callable, jobs: List[Tuple]) -> List:
+        """``func(*job)`` for each job, in job order; fans out to processes when enabled.
 
-        events = self.event_service.get_events_for_date(current_date)
-        event_adjustment, _ = calculate_event_adjustment(current_date, events)
+        Each job is a pure function of its arguments, so the pooled results are
+        identical to the serial ones and come back in the same order.  All
+        requests share one pool of ``BACKTEST_MAX_WORKERS`` processes.
+        """
 
-        total = calculate_total_score(technical_score, macro_score, event_adjustment)
-        return total
+        if self.max_workers <= 1 or len(jobs) <= 1:
+            return [func(*job) for job in jobs]
+        return list(self._process_pool().map(func, *zip(*jobs)))
 
-    def _compute_max_drawdown(self, values: List[float]) -> float:
-        peak = values[0]
-        max_dd = 0.0
-        for v in values:
-            if v > peak:
-                peak = v
-            dd = (peak - v) / peak if peak != 0 else 0
-            if dd > max_dd:
-                max_dd = dd
-        return round(max_dd * 100, 2)
+    def _load_inputs(
+        self, start_date: date, end_date: date, index_type: str, score_ma: int
+    ) -> Tuple[PriceSeries, Dict[str, List[Tuple[date, float]]]]:
+        price_history = self._load_price_history(start_date, end_date, index_type, score_ma)
+        macro_series = self.macro_service.get_macro_series_range(start_date, end_date)
+        return price_history, macro_series
+
+    def _load_price_history(
+        self, start_date: date, end_date: date, index_type: str, score_ma: int
+    ) -> PriceSeries:
+        price_history = as_price_series(
+            self.market_service.get_price_history_range(
+                start_date, end_date, allow_fallback=self.allow_fallback, index_type=index_type
+            )
+        )
+        required_points = max(200, score_ma)
+        if len(price_history) < required_points:
+            raise ValueError(
+                f"Not enough price history to run backtest (need >= {required_points} days)"
+            )
+        return price_history
 
     def run_backtest(
         self,
@@ -85,76 +300,106 @@ class BacktestService:
         index_type: str = "SP500",
         score_ma: int = 200,
     ) -> Dict:
-        price_history = self.market_service.get_price_history_range(
-            start_date, end_date, allow_fallback=self.allow_fallback, index_type=index_type
+        price_history, macro_series = self._load_inputs(start_date, end_date, index_type, score_ma)
+        return _backtest_job(
+            price_history,
+            macro_series,
+            _event_calendar(self.event_service, [price_history], _first_scored_index(score_ma)),
+            initial_cash,
+            buy_threshold,
+            sell_threshold,
+            score_ma,
         )
-        required_points = max(200, score_ma)
-        if len(price_history) < required_points:
-            raise ValueError(
-                f"Not enough price history to run backtest (need >= {required_points} days)"
-            )
+
+    def run_multi_index(
+        self,
+        start_date: date,
+        end_date: date,
+        initial_cash: float,
+        index_types: Sequence[str],
+        buy_threshold: float = 40.0,
+        sell_threshold: float = 80.0,
+        score_ma: int = 200,
+    ) -> Dict[str, Dict]:
+        """同じ条件で複数指数のバックテストを行う。マクロ系列は1回だけ取得して共有する。"""
+
+        index_values = list(dict.fromkeys(index_types))
+        if not index_values:
+            raise ValueError("index_types must not be empty")
 
         macro_series = self.macro_service.get_macro_series_range(start_date, end_date)
+        histories = [
+            self._load_price_history(start_date, end_date, index_type, score_ma)
+            for index_type in index_values
+        ]
+        event_calendar = _event_calendar(self.event_service, histories, _first_scored_index(score_ma))
+        jobs = [
+            (
+                price_history,
+                macro_series,
+                event_calendar,
+                initial_cash,
+                buy_threshold,
+                sell_threshold,
+                score_ma,
+            )
+            for price_history in histories
+        ]
+        results = self._map_jobs(_backtest_job, jobs)
+        return dict(zip(index_values, results))
 
-        cash = initial_cash
-        shares = 0
-        portfolio_history: List[Dict] = []
-        trades: List[Dict] = []
+    def run_sweep(
+        self,
+        start_date: date,
+        end_date: date,
+        initial_cash: float,
+        buy_thresholds: Sequence[float],
+        sell_thresholds: Sequence[float],
+        index_type: str = "SP500",
+        score_mas: Sequence[int] = (200,),
+    ) -> Dict:
+        """閾値・score_ma の全組み合わせを、データ取得とスコア計算を共有して一括評価する。
 
-        hold_cash = initial_cash
-        hold_shares = 0
-        first_price = price_history[0][1]
-        hold_shares = floor(hold_cash / first_price)
-        hold_cash -= hold_shares * first_price
-        buy_hold_history: List[Dict] = []
+        価格・マクロは1回だけ取得し、スコア系列は score_ma ごとに1回だけ計算して
+        各閾値ペアの売買シミュレーションに使い回す。結果は CAGR 降順
+        （同率なら最大ドローダウンが小さい順、取引回数が少ない順）に並べる。
+        """
 
-        for idx, (date_str, close) in enumerate(price_history):
-            current_dt = date.fromisoformat(date_str)
+        buy_values = list(dict.fromkeys(buy_thresholds))
+        sell_values = list(dict.fromkeys(sell_thresholds))
+        ma_values = list(dict.fromkeys(score_mas))
+        combinations = len(buy_values) * len(sell_values) * len(ma_values)
+        if combinations == 0:
+            raise ValueError("buy_thresholds, sell_thresholds and score_mas must not be empty")
+        if combinations > MAX_SWEEP_COMBINATIONS:
+            raise ValueError(
+                f"Too many sweep combinations ({combinations} > {MAX_SWEEP_COMBINATIONS})"
+            )
 
-            if idx >= max(score_ma - 1, 199):
-                sub_history = price_history[: idx + 1]
-                score = self._calculate_scores(sub_history, macro_series, current_dt, score_ma)
+        price_history, macro_series = self._load_inputs(
+            start_date, end_date, index_type, max(ma_values)
+        )
+        first_idx = min(_first_scored_index(score_ma) for score_ma in ma_values)
+        macro_event_scores = _macro_event_scores(
+            price_history,
+            macro_series,
+            _event_calendar(self.event_service, [price_history], first_idx),
+            first_idx,
+        )
 
-                if shares > 0 and score >= sell_threshold:
-                    cash += shares * close
-                    trades.append(
-                        {"action": "SELL", "date": date_str, "quantity": shares, "price": close}
-                    )
-                    shares = 0
-                elif shares == 0 and score < buy_threshold:
-                    qty = floor(cash / close)
-                    if qty > 0:
-                        cash -= qty * close
-                        shares += qty
-                        trades.append(
-                            {"action": "BUY", "date": date_str, "quantity": qty, "price": close}
-                        )
-
-            portfolio_value = cash + shares * close
-            portfolio_history.append({"date": date_str, "value": round(portfolio_value, 2)})
+        jobs = [
+            (price_history, macro_event_scores, score_ma, initial_cash, buy_values, sell_values)
+            for score_ma in ma_values
+        ]
+        results: List[Dict] = []
+        for rows in self._map_jobs(_sweep_job, jobs):
+            results.extend(rows)
 
-            hold_value = hold_cash + hold_shares * close
-            buy_hold_history.append({"date": date_str, "value": round(hold_value, 2)})
+        buy_and_hold_final = results[0]["buy_and_hold_final"]
+        for row in results:
+            del row["buy_and_hold_final"]
+        results.sort(key=lambda r: (-r["cagr_pct"], r["max_drawdown_pct"], r["trade_count"]))
+        for rank, row in enumerate(results, start=1):
+            row["rank"] = rank
 
-        final_price = price_history[-1][1]
-        final_value = cash + shares * final_price
-        buy_hold_final = hold_cash + hold_shares * final_price
-
-        total_return = (final_value / initial_cash) - 1 if initial_cash else 0
-        days = (date.fromisoformat(price_history[-1][0]) - date.fromisoformat(price_history[0][0])).days
-        years = days / 365.0 if days > 0 else 1
-        cagr = (final_value / initial_cash) ** (1 / years) - 1 if initial_cash else 0
-
-        max_dd = self._compute_max_drawdown([p["value"] for p in portfolio_history])
-
-        return {
-            "final_value": round(final_value, 2),
-            "buy_and_hold_final": round(buy_hold_final, 2),
-            "total_return_pct": round(total_return * 100, 2),
-            "cagr_pct": round(cagr * 100, 2),
-            "max_drawdown_pct": max_dd,
-            "trade_count": len(trades),
-            "trades": trades,
-            "portfolio_history": portfolio_history,
-            "buy_hold_history": buy_hold_history,
-        }
+        return {"buy_and_hold_final": buy_and_hold_final, "results": results}
@@ -0,0 +1,197 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Callable, Dict, Generic, Hashable, List, Optional, Tuple, TypeVar
+
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass
+class CacheEntry(Generic[T]):
+    value: T
+    built_at: float
+    version: int
+    ttl: Optional[float] = None
+
+
+class _Flight:
+    """One in-progress build that concurrent callers wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.entry: Optional[CacheEntry] = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlightCache(Generic[T]):
+    """Thread-safe TTL cache where concurrent misses for a key share a single build.
+
+    With ``stale_while_revalidate`` an expired entry is returned immediately
+    while one background thread rebuilds it; callers only block when nothing
+    has been cached for the key yet.  Failed builds are not cached: waiters
+    get the exception and, for background refreshes, the stale value stays.
+    With ``maxsize`` the least recently used entries are evicted first.
+    ``ttl_for`` overrides the TTL per value (e.g. until a known publication time).
+    """
+
+    def __init__(
+        self,
+        ttl: timedelta,
+        stale_while_revalidate: bool = False,
+        name: str = "cache",
+        clock: Callable[[], float] = time.monotonic,
+        maxsize: Optional[int] = None,
+        ttl_for: Optional[Callable[[T], timedelta]] = None,
+    ):
+        self.ttl = ttl.total_seconds()
+        self.ttl_for = ttl_for
+        self.stale_while_revalidate = stale_while_revalidate
+        self.name = name
+        self.maxsize = maxsize
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, CacheEntry[T]]" = OrderedDict()
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._versions: Dict[Hashable, int] = {}
+
+    def _is_fresh(self, entry: CacheEntry[T]) -> bool:
+        ttl = self.ttl if entry.ttl is None else entry.ttl
+        return self._clock() - entry.built_at < ttl
+
+    def peek(self, key: Hashable) -> Optional[CacheEntry[T]]:
+        with self._lock:
+            return self._entries.get(key)
+
+    def get(self, key: Hashable, builder: Callable[[], T]) -> T:
+        return self.get_entry(key, builder).value
+
+    def get_entry(self, key: Hashable, builder: Callable[[], T]) -> CacheEntry[T]:
+        """Like ``get`` but returns the entry, so callers can key derived data by its version."""
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            if entry is not None and self._is_fresh(entry):
+                return entry
+            if entry is not None and self.stale_while_revalidate:
+                self._revalidate(key, builder)
+                return entry
+            flight, leader = self._join_flight(key)
+
+        if leader:
+            return self._build(key, builder, flight)
+        return self._wait(flight)
+
+    def get_entry_nowait(self, key: Hashable, builder: Callable[[], T]) -> Optional[CacheEntry[T]]:
+        """The entry ``get_entry`` would return without blocking, or ``None`` if it would block.
+
+        A stale entry (with ``stale_while_revalidate``) is returned and its
+        background rebuild started, exactly as ``get`` does; async callers
+        only need to hand the key to a thread when nothing usable is cached.
+        """
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            if self._is_fresh(entry):
+                return entry
+            if not self.stale_while_revalidate:
+                return None
+            self._revalidate(key, builder)
+            return entry
+
+    def refresh(self, key: Hashable, builder: Callable[[], T]) -> T:
+        """Rebuild ``key`` now (or wait for the build already running) and return it."""
+
+        with self._lock:
+            flight, leader = self._join_flight(key)
+        if leader:
+            return self._build(key, builder, flight).value
+        return self._wait(flight).value
+
+    def put(self, key: Hashable, value: T) -> None:
+        """Store an externally built value (e.g. from a batched fetch) as a fresh entry."""
+
+        with self._lock:
+            self._store(key, value)
+
+    def fresh_items(self) -> List[Tuple[Hashable, T]]:
+        """(key, value) pairs that are still within the TTL, oldest use first."""
+
+        with self._lock:
+            return [
+                (key, entry.value) for key, entry in self._entries.items() if self._is_fresh(entry)
+            ]
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def _revalidate(self, key: Hashable, builder: Callable[[], T]) -> None:
+        # caller holds self._lock
+        if key in self._flights:
+            return
+        flight = self._flights[key] = _Flight()
+        threading.Thread(
+            target=self._build_in_background,
+            args=(key, builder, flight),
+            name=f"{self.name}-refresh-{key}",
+            daemon=True,
+        ).start()
+
+    def _join_flight(self, key: Hashable):
+        # caller holds self._lock
+        flight = self._flights.get(key)
+        if flight is not None:
+            return flight, False
+        flight = self._flights[key] = _Flight()
+        return flight, True
+
+    def _store(self, key: Hashable, value: T) -> CacheEntry[T]:
+        # caller holds self._lock
+        version = self._versions.get(key, 0) + 1
+        self._versions[key] = version
+        ttl = self.ttl_for(value).total_seconds() if self.ttl_for is not None else None
+        entry = self._entries[key] = CacheEntry(value, self._clock(), version, ttl)
+        self._entries.move_to_end(key)
+        while self.maxsize is not None and len(self._entries) > self.maxsize:
+            evicted, _ = self._entries.popitem(last=False)
+            self._versions.pop(evicted, None)
+        return entry
+
+    def _wait(self, flight: _Flight) -> CacheEntry[T]:
+        flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.entry
+
+    def _build(self, key: Hashable, builder: Callable[[], T], flight: _Flight) -> CacheEntry[T]:
+        try:
+            value = builder()
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        else:
+            with self._lock:
+                entry = self._store(key, value)
+            flight.entry = entry
+            return entry
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def _build_in_background(self, key: Hashable, builder: Callable[[], T], flight: _Flight) -> None:
+        try:
+            self._build(key, builder, flight)
+        except Exception as exc:
+            logger.warning("[%s] background refresh failed for %s (%s)", self.name, key, exc)
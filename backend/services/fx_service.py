@@ -0,0 +1,110 @@
+import logging
+import os
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional, Tuple
+
+import pandas as pd
+import yfinance as yf
+
+from .cache import SingleFlightCache
+
+
+logger = logging.getLogger(__name__)
+
+
+def _close_series(hist: pd.DataFrame) -> pd.Series:
+    close = hist.get("Close")
+    if close is None:
+        close = hist.get("Adj Close")
+    if close is None:
+        raise ValueError("close column missing")
+    if isinstance(close, pd.DataFrame):
+        close = close.iloc[:, 0]
+    return close.dropna()
+
+
+class FxRateProvider:
+    """Shared FX lookups (e.g. ``JPY=X``) for the market and NAV services.
+
+    ``latest`` caches the most recent daily close for ``FX_RATE_TTL_SECONDS``,
+    ``live`` caches the intraday rate for ``FX_LIVE_TTL_SECONDS`` and
+    ``history`` caches daily closes for ``FX_HISTORY_TTL_SECONDS``; a cached
+    history that covers a requested range is sliced instead of downloaded
+    again.  Concurrent misses share one download and failures are not
+    cached, so callers keep their own fallbacks.
+    """
+
+    def __init__(self, rate_ttl: Optional[timedelta] = None, history_ttl: Optional[timedelta] = None):
+        self._rates = SingleFlightCache(
+            ttl=rate_ttl or timedelta(seconds=float(os.getenv("FX_RATE_TTL_SECONDS", "300"))),
+            name="fx-rate",
+        )
+        self._live_rates = SingleFlightCache(
+            ttl=timedelta(seconds=float(os.getenv("FX_LIVE_TTL_SECONDS", "15"))),
+            name="fx-live",
+        )
+        self._histories = SingleFlightCache(
+            ttl=history_ttl or timedelta(seconds=float(os.getenv("FX_HISTORY_TTL_SECONDS", "900"))),
+            name="fx-history",
+            maxsize=16,
+        )
+
+    def latest(self, symbol: str = "JPY=X") -> Tuple[float, str]:
+        """(rate, ISO date of the rate); raises when no rate can be fetched."""
+
+        return self._rates.get(symbol, lambda: self._fetch_latest(symbol))
+
+    def live(self, symbol: str = "JPY=X") -> Tuple[float, str, str]:
+        """(rate, as_of, source): the intraday rate (``"live"``, fetch time), else the
+        latest daily close (``"close"``, its date); raises when neither is available."""
+
+        try:
+            return self._live_rates.get(symbol, lambda: self._fetch_live(symbol))
+        except Exception as exc:
+            logger.info("Live fx rate unavailable for %s (%s)", symbol, exc)
+        rate, as_of = self.latest(symbol)
+        return rate, as_of, "close"
+
+    def _fetch_live(self, symbol: str) -> Tuple[float, str, str]:
+        fast_info = yf.Ticker(symbol).fast_info
+        live = fast_info.get("lastPrice") if fast_info else None
+        if not live:
+            raise ValueError(f"no intraday fx rate for {symbol}")
+        return round(float(live), 4), datetime.now(timezone.utc).isoformat(), "live"
+
+    def _fetch_latest(self, symbol: str) -> Tuple[float, str]:
+        closes = _close_series(yf.download(symbol, period="5d", interval="1d"))
+        if closes.empty:
+            raise ValueError(f"empty fx rate for {symbol}")
+        logger.info("Fetched latest fx rate for %s", symbol)
+        return round(float(closes.iloc[-1]), 4), closes.index[-1].date().isoformat()
+
+    def history(self, symbol: str, start: date, end: date) -> pd.Series:
+        """Daily closes of ``symbol`` between ``start`` and ``end`` (inclusive)."""
+
+        for (cached_symbol, cached_start, cached_end), closes in self._histories.fresh_items():
+            if cached_symbol == symbol and cached_start <= start and cached_end >= end:
+                return self._slice(closes, start, end)
+        return self._histories.get(
+            (symbol, start, end), lambda: self._fetch_history(symbol, start, end)
+        )
+
+    def put_history(self, symbol: str, start: date, end: date, closes: pd.Series) -> None:
+        """Seed the cache from a download made elsewhere (e.g. a batched multi-symbol fetch)."""
+
+        if not closes.empty:
+            self._histories.put((symbol, start, end), closes)
+
+    def _fetch_history(self, symbol: str, start: date, end: date) -> pd.Series:
+        hist = yf.download(symbol, start=start, end=end + timedelta(days=1), interval="1d")
+        closes = _close_series(hist)
+        if closes.empty:
+            raise ValueError(f"empty history for {symbol}")
+        logger.info("Fetched fx history for %s (%s..%s)", symbol, start, end)
+        return closes
+
+    @staticmethod
+    def _slice(closes: pd.Series, start: date, end: date) -> pd.Series:
+        index = closes.index
+        mask = (index >= pd.Timestamp(start)) & (index < pd.Timestamp(end + timedelta(days=1)))
+        return closes[mask]
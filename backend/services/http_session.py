@@ -0,0 +1,72 @@
+import os
+import threading
+from typing import Dict, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+# 一時的な失敗（接続断・429・5xx）は疑似データへ落とす前にバックオフ付きで再試行する
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_sessions: Dict[str, requests.Session] = {}
+_lock = threading.Lock()
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+def default_timeout() -> Tuple[float, float]:
+    """(connect, read) timeouts: fail fast on unreachable hosts, allow slow bodies."""
+
+    return (
+        _env_float("HTTP_CONNECT_TIMEOUT_SECONDS", 3.05),
+        _env_float("HTTP_READ_TIMEOUT_SECONDS", 10.0),
+    )
+
+
+def build_session(
+    retries: int = 3,
+    backoff_factor: float = 0.5,
+    pool_maxsize: int = 10,
+    gzip: bool = True,
+) -> requests.Session:
+    """A keep-alive ``requests.Session`` with bounded retry/backoff on idempotent GETs."""
+
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        status=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset({"GET"}),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["Accept-Encoding"] = "gzip, deflate" if gzip else "identity"
+    return session
+
+
+def shared_session(name: str) -> requests.Session:
+    """Process-wide session per upstream (e.g. ``"fred"``, ``"nav"``) so connections are reused."""
+
+    with _lock:
+        session = _sessions.get(name)
+        if session is None:
+            session = _sessions[name] = build_session(
+                retries=int(_env_float("HTTP_MAX_RETRIES", 3)),
+                backoff_factor=_env_float("HTTP_RETRY_BACKOFF_SECONDS", 0.5),
+                pool_maxsize=int(_env_float("HTTP_POOL_MAXSIZE", 10)),
+                gzip=os.getenv("HTTP_ACCEPT_GZIP", "1").lower() in {"1", "true", "yes", "on"},
+            )
+        return session
@@ -1,20 +1,77 @@
+import logging
 import os
 import random
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import date, timedelta
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 
-import requests
+import numpy as np
 import pandas as pd
 import yfinance as yf
 from dotenv import load_dotenv
 
+from . import synthetic
+from .cache import SingleFlightCache
+from .http_session import default_timeout, shared_session
+
+
+logger = logging.getLogger(__name__)
+
+FRED_OBSERVATIONS_URL = "https://api.stlouisfed.org/fred/series/observations"
+
 
 class MacroDataService:
     """Fetches macro series (10y, CPI, VIX) with live sources and graceful fallbacks."""
 
+    # 疑似データ生成パラメータ (base, variance, seed_tag)
+    SYNTHETIC_PARAMS = {
+        "r_10y": (3.5, 1.0, "r10y"),
+        "cpi": (4.0, 1.2, "cpi"),
+        "vix": (18.0, 5.0, "vix"),
+    }
+
     def __init__(self):
         load_dotenv()
         self.fred_api_key = os.getenv("FRED_API_KEY")
+        # FRED への接続は keep-alive で使い回し、一時的な失敗は再試行してから諦める
+        self.http = shared_session("fred")
+        self.http_timeout = default_timeout()
+        # 3系列は独立しているので並行取得し、系列ごとにタイムアウトさせる
+        self.fetch_timeout = float(os.getenv("MACRO_FETCH_TIMEOUT_SECONDS", "15"))
+        self._executor = ThreadPoolExecutor(max_workers=6, thread_name_prefix="macro-fetch")
+        self._cache = SingleFlightCache(
+            ttl=timedelta(seconds=float(os.getenv("MACRO_CACHE_TTL_SECONDS", "900"))),
+            maxsize=int(os.getenv("MACRO_CACHE_MAX_ENTRIES", "32")),
+            name="macro",
+        )
+
+    def shutdown(self) -> None:
+        """Stop the fetch pool without waiting for abandoned (timed-out) fetches."""
+
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _fetch_concurrently(self, fetchers: Dict[str, Tuple[Callable, Callable]]) -> Dict:
+        """Run each ``(fetch, fallback)`` pair in parallel under one shared deadline.
+
+        Fetches still pending when ``fetch_timeout`` expires use their fallback;
+        queued ones are cancelled so they do not occupy the pool later.
+        """
+
+        futures = {name: self._executor.submit(fetch) for name, (fetch, _) in fetchers.items()}
+        done, _ = wait(futures.values(), timeout=self.fetch_timeout)
+        results = {}
+        for name, future in futures.items():
+            if future in done:
+                results[name] = future.result()
+                continue
+            future.cancel()
+            logger.warning(
+                "Macro fetch for %s timed out after %.0fs, using synthetic series",
+                name,
+                self.fetch_timeout,
+            )
+            results[name] = fetchers[name][1]()
+        return results
 
     def _extract_close_series(self, df: pd.DataFrame) -> pd.Series:
         close = df.get("Close")
@@ -47,9 +104,7 @@ class MacroDataService:
         if end:
             params["observation_end"] = end.isoformat()
         try:
-            resp = requests.get(
-                "https://api.stlouisfed.org/fred/series/observations", params=params, timeout=10
-            )
+            resp = self.http.get(FRED_OBSERVATIONS_URL, params=params, timeout=self.http_timeout)
             resp.raise_for_status()
             observations = resp.json().get("observations", [])
             values: List[float] = []
@@ -75,9 +130,7 @@ class MacroDataService:
             "observation_end": end.isoformat(),
         }
         try:
-            resp = requests.get(
-                "https://api.stlouisfed.org/fred/series/observations", params=params, timeout=10
-            )
+            resp = self.http.get(FRED_OBSERVATIONS_URL, params=params, timeout=self.http_timeout)
             resp.raise_for_status()
             observations = resp.json().get("observations", [])
             series: List[Tuple[date, float]] = []
@@ -91,50 +144,67 @@ class MacroDataService:
         except Exception:
             return []
 
+    # 最新系列の取得は実データのみ（取得できなければ例外）。疑似系列への切り替えは _cached_latest で行う
     def _fetch_vix(self) -> Tuple[List[float], float]:
-        try:
-            ticker = yf.Ticker("^VIX")
-            hist = ticker.history(period="2y", interval="1d")
-            if hist.empty:
-                raise ValueError("empty VIX history")
-            closes = hist["Close"].dropna()
-            history = [round(float(val), 2) for val in closes[:-1]]
-            current = round(float(closes.iloc[-1]), 2)
-            return history, current
-        except Exception:
-            return self._synthetic_series(18.0, 5.0, seed_tag="vix")
+        ticker = yf.Ticker("^VIX")
+        hist = ticker.history(period="2y", interval="1d")
+        if hist.empty:
+            raise ValueError("empty VIX history")
+        closes = hist["Close"].dropna()
+        history = [round(float(val), 2) for val in closes[:-1]]
+        current = round(float(closes.iloc[-1]), 2)
+        return history, current
 
     def _fetch_r10y(self) -> Tuple[List[float], float]:
         start = date.today() - timedelta(days=3650)
         values = self._fetch_fred_series("DGS10", start)
-        if values:
-            return values[:-1], values[-1]
-        return self._synthetic_series(3.5, 1.0, seed_tag="r10y")
+        if not values:
+            raise ValueError("no live data for r_10y")
+        return values[:-1], values[-1]
 
     def _fetch_cpi(self) -> Tuple[List[float], float]:
         start = date.today() - timedelta(days=3650)
         values = self._fetch_fred_series("CPIAUCSL", start)
-        if values:
-            return values[:-1], values[-1]
-        return self._synthetic_series(4.0, 1.2, seed_tag="cpi")
+        if not values:
+            raise ValueError("no live data for cpi")
+        return values[:-1], values[-1]
+
+    def _synthetic_latest(self, name: str) -> Tuple[List[float], float]:
+        base, variance, seed_tag = self.SYNTHETIC_PARAMS[name]
+        return self._synthetic_series(base, variance, seed_tag=seed_tag)
+
+    def _cached_latest(self, name: str) -> Tuple[List[float], float]:
+        """実データの最新系列。取得に失敗した場合は疑似系列を返し、キャッシュはしない。"""
+
+        live_fetchers = {
+            "r_10y": self._fetch_r10y,
+            "cpi": self._fetch_cpi,
+            "vix": self._fetch_vix,
+        }
+        try:
+            return self._cache.get(("latest", name), live_fetchers[name])
+        except Exception as exc:
+            logger.warning("Macro fetch for %s failed (%s), using synthetic series", name, exc)
+            return self._synthetic_latest(name)
 
     def _synthetic_series_with_dates(
         self, start: date, end: date, base: float, variance: float, seed_tag: str
     ) -> List[Tuple[date, float]]:
-        days = (end - start).days
-        if days <= 0:
-            days = 30
-        rng = random.Random(
-            f"{seed_tag}:{base}:{variance}:{start.isoformat()}:{end.isoformat()}:{days}"
+        if end <= start:
+            end = start + timedelta(days=30)
+        dates = synthetic.business_days(start, end)
+        if not len(dates):
+            # 週末だけの期間でも1点は返す（呼び出し側は疑似系列を有効なデータとして扱う）
+            dates = np.array([start], dtype="datetime64[D]")
+        values = synthetic.random_walk(
+            len(dates),
+            base,
+            variance,
+            seed_tag=f"{seed_tag}:{base}:{variance}:{start.isoformat()}:{end.isoformat()}",
         )
-        series: List[Tuple[date, float]] = []
-        value = base
-        for i in range(days + 1):
-            value += rng.uniform(-variance, variance)
-            series.append((start + timedelta(days=i), round(value, 3)))
-        return series
-
-    def _fetch_vix_range(self, start: date, end: date) -> List[Tuple[date, float]]:
+        return synthetic.to_date_rows(dates, values, 3)
+
+    def _fetch_vix_range_live(self, start: date, end: date) -> List[Tuple[date, float]]:
         try:
             data = yf.download("^VIX", start=start, end=end + timedelta(days=1), interval="1d")
             data = data.dropna()
@@ -143,9 +213,9 @@ class MacroDataService:
             closes = self._extract_close_series(data)
             return [(idx.date(), round(float(val), 3)) for idx, val in closes.items()]
         except Exception:
-            return self._synthetic_series_with_dates(start, end, 18.0, 5.0, seed_tag="vix")
+            return []
 
-    def _fetch_r10y_range(self, start: date, end: date) -> List[Tuple[date, float]]:
+    def _fetch_r10y_range_live(self, start: date, end: date) -> List[Tuple[date, float]]:
         values = []
         if self.fred_api_key:
             values = self._fetch_fred_series_with_dates("DGS10", start, end)
@@ -158,28 +228,64 @@ class MacroDataService:
                     values = [(idx.date(), round(float(val) / 10, 3)) for idx, val in closes.items()]
             except Exception:
                 pass
-        if not values:
-            values = self._synthetic_series_with_dates(start, end, 3.5, 1.0, seed_tag="r10y")
         return values
 
-    def _fetch_cpi_range(self, start: date, end: date) -> List[Tuple[date, float]]:
+    def _fetch_cpi_range_live(self, start: date, end: date) -> List[Tuple[date, float]]:
         values: List[Tuple[date, float]] = []
         if self.fred_api_key:
             values = self._fetch_fred_series_with_dates("CPIAUCSL", start, end)
-        if not values:
-            values = self._synthetic_series_with_dates(start, end, 4.0, 1.2, seed_tag="cpi")
         return values
 
-    def get_macro_series_range(self, start: date, end: date) -> Dict[str, List[Tuple[date, float]]]:
-        return {
-            "r_10y": self._fetch_r10y_range(start, end),
-            "cpi": self._fetch_cpi_range(start, end),
-            "vix": self._fetch_vix_range(start, end),
+    def _synthetic_range(self, name: str, start: date, end: date) -> List[Tuple[date, float]]:
+        base, variance, seed_tag = self.SYNTHETIC_PARAMS[name]
+        return self._synthetic_series_with_dates(start, end, base, variance, seed_tag=seed_tag)
+
+    def _cached_range(self, name: str, start: date, end: date) -> List[Tuple[date, float]]:
+        """実データの期間系列。キャッシュ済みの上位期間があれば切り出して返す。
+
+        疑似系列は期間ごとにシードが変わるためキャッシュ・切り出しの対象外とする。
+        """
+
+        for key, points in self._cache.fresh_items():
+            if key[0] == "range" and key[1] == name and key[2] <= start and end <= key[3]:
+                return [(d, v) for d, v in points if start <= d <= end]
+
+        live_fetchers = {
+            "r_10y": self._fetch_r10y_range_live,
+            "cpi": self._fetch_cpi_range_live,
+            "vix": self._fetch_vix_range_live,
         }
 
+        def build():
+            points = live_fetchers[name](start, end)
+            if not points:
+                raise ValueError(f"no live data for {name}")
+            return points
+
+        try:
+            return self._cache.get(("range", name, start, end), build)
+        except ValueError:
+            return self._synthetic_range(name, start, end)
+
+    def get_macro_series_range(self, start: date, end: date) -> Dict[str, List[Tuple[date, float]]]:
+        return self._fetch_concurrently(
+            {
+                name: (
+                    lambda name=name: self._cached_range(name, start, end),
+                    lambda name=name: self._synthetic_range(name, start, end),
+                )
+                for name in ("r_10y", "cpi", "vix")
+            }
+        )
+
     def get_macro_series(self) -> Dict[str, Tuple[List[float], float]]:
-        return {
-            "r_10y": self._fetch_r10y(),
-            "cpi": self._fetch_cpi(),
-            "vix": self._fetch_vix(),
-        }
+        # 全指数・全エンドポイントで共有し、TTL 内は系列ごとに1回しか取得しない
+        return self._fetch_concurrently(
+            {
+                name: (
+                    lambda name=name: self._cached_latest(name),
+                    lambda name=name: self._synthetic_latest(name),
+                )
+                for name in ("r_10y", "cpi", "vix")
+            }
+        )
@@ -1,18 +1,70 @@
 import os
-from datetime import date
-from typing import Optional, Tuple
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Callable, Dict, Optional, Tuple
 
 import yfinance as yf
 
+from .cache import SingleFlightCache
+from .fx_service import FxRateProvider
+
+
+JST = timezone(timedelta(hours=9))
+
 
 class FundNavService:
+    """Fund NAV (official, or synthesized from the S&P500 proxy and USD/JPY).
+
+    The fund publishes one NAV per business day, so the official NAV is kept
+    until the next expected publication (``FUND_NAV_PUBLISH_HOUR_JST`` on the
+    next weekday).  If the latest expected NAV has not shown up yet, or the
+    fetch failed, it is re-checked every ``FUND_NAV_RETRY_SECONDS`` instead.
+    """
+
     def __init__(
         self,
         base_symbol: Optional[str] = None,
         fund_symbol: Optional[str] = None,
+        fx_provider: Optional[FxRateProvider] = None,
+        now: Optional[Callable[[], datetime]] = None,
     ):
+        self.fx = fx_provider or FxRateProvider()
         self.base_symbol = base_symbol or os.getenv("SP500_NAV_BASE_SYMBOL", "VOO")
         self.fund_symbol = fund_symbol or os.getenv("SP500_FUND_SYMBOL", "03311187.T")
+        self.publish_time = time(hour=int(os.getenv("FUND_NAV_PUBLISH_HOUR_JST", "20")))
+        self.retry_after = timedelta(seconds=float(os.getenv("FUND_NAV_RETRY_SECONDS", "900")))
+        self._now = now or (lambda: datetime.now(JST))
+        self._official_cache = SingleFlightCache(
+            ttl=self.retry_after, name="fund-nav", ttl_for=self._official_nav_ttl
+        )
+        self._synthetic_cache = SingleFlightCache(
+            ttl=timedelta(seconds=float(os.getenv("FUND_NAV_SYNTHETIC_TTL_SECONDS", "300"))),
+            name="synthetic-nav",
+        )
+
+    def _publication_at(self, day: date) -> datetime:
+        return datetime.combine(day, self.publish_time, tzinfo=JST)
+
+    def last_publication(self, now: datetime) -> datetime:
+        """Most recent expected NAV publication at or before ``now`` (weekdays only)."""
+
+        day = now.astimezone(JST).date()
+        while day.weekday() >= 5 or self._publication_at(day) > now:
+            day -= timedelta(days=1)
+        return self._publication_at(day)
+
+    def next_publication(self, now: datetime) -> datetime:
+        day = now.astimezone(JST).date()
+        while day.weekday() >= 5 or self._publication_at(day) <= now:
+            day += timedelta(days=1)
+        return self._publication_at(day)
+
+    def _official_nav_ttl(self, nav: Optional[Dict]) -> timedelta:
+        now = self._now()
+        until_next = self.next_publication(now) - now
+        # 祝日や公表遅れで最新分がまだ無い場合は、短い間隔で取り直す
+        if nav is None or date.fromisoformat(nav["asOf"]) < self.last_publication(now).date():
+            return min(self.retry_after, until_next)
+        return until_next
 
     def fetch_sp500_price_usd(self) -> Tuple[float, str]:
         """Fetch the latest close for the S&P500 proxy in USD and its date."""
@@ -33,12 +85,9 @@ class FundNavService:
 
     def fetch_usdjpy_rate(self) -> Tuple[float, str]:
         try:
-            fx = yf.download("JPY=X", period="5d", interval="1d").dropna()
-            if not fx.empty:
-                return round(float(fx["Close"].iloc[-1]), 4), fx.index[-1].date().isoformat()
+            return self.fx.latest("JPY=X")
         except Exception:
-            pass
-        return 150.0, date.today().isoformat()
+            return 150.0, date.today().isoformat()
 
     def compute_synthetic_nav_jpy(self, price_usd: float, usd_jpy: float) -> float:
         return round(price_usd * usd_jpy, 2)
@@ -55,6 +104,9 @@ class FundNavService:
         return None
 
     def get_synthetic_nav(self):
+        return self._synthetic_cache.get("synthetic", self._build_synthetic_nav)
+
+    def _build_synthetic_nav(self):
         price_usd, price_date = self.fetch_sp500_price_usd()
         usd_jpy, fx_date = self.fetch_usdjpy_rate()
         nav_jpy = self.compute_synthetic_nav_jpy(price_usd, usd_jpy)
@@ -67,6 +119,9 @@ class FundNavService:
         }
 
     def get_official_nav(self):
+        return self._official_cache.get("official", self._load_official_nav)
+
+    def _load_official_nav(self):
         nav = self.fetch_fund_nav_jpy()
         if nav:
             nav_jpy, nav_date = nav
@@ -0,0 +1,29 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, TypeVar
+
+
+T = TypeVar("T")
+
+
+class BlockingPool:
+    """Dedicated, bounded thread pool for the blocking calls of async endpoints.
+
+    yfinance, FRED and the NAV API are synchronous, so async endpoints hand
+    them to a pool of their own instead of Starlette's shared threadpool: a
+    hung data source can only exhaust its pool, never stall cheap endpoints
+    such as ``/api/health`` or cache hits served on the event loop.
+    """
+
+    def __init__(self, name: str, max_workers: int):
+        self.name = name
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+
+    async def run(self, func: Callable[..., T], *args, **kwargs) -> T:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,94 @@
+"""Wire formats for chart price series (date, close, MA20/60/200 columns).
+
+* ``rows``: ``[{"date", "close", "ma20", "ma60", "ma200"}, ...]`` (the original format)
+* ``columnar``: ``{"date": [...], "close": [...], "ma20": [...], ...}``; missing MAs are ``null``
+* ``f32``: little-endian binary ``uint32 count``, ``int32 date[count]`` (days since
+  1970-01-01), then ``float32[count]`` for each of close/ma20/ma60/ma200; missing MAs are NaN
+"""
+
+import math
+import struct
+from datetime import date
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .serialization import SerializedBody, dumps_json
+
+
+FORMATS = ("rows", "columnar", "f32")
+VALUE_COLUMNS = ("close", "ma20", "ma60", "ma200")
+MEDIA_TYPES = {
+    "rows": "application/json",
+    "columnar": "application/vnd.price-series.columnar+json",
+    "f32": "application/vnd.price-series.f32",
+}
+
+
+def select_format(requested: Optional[str], accept: Optional[str]) -> str:
+    """Explicit ``format=`` wins; otherwise the first compact media type in ``Accept``."""
+
+    if requested:
+        return requested
+    if accept:
+        for part in accept.split(","):
+            media_type = part.split(";")[0].strip()
+            for fmt, candidate in MEDIA_TYPES.items():
+                if fmt != "rows" and media_type == candidate:
+                    return fmt
+    return "rows"
+
+
+def slice_since(columns: Dict[str, np.ndarray], since: date) -> Dict[str, np.ndarray]:
+    """Points strictly after ``since`` (for clients that already hold the older ones)."""
+
+    start = int(np.searchsorted(columns["date"], np.datetime64(since, "D"), side="right"))
+    return {name: values[start:] for name, values in columns.items()}
+
+
+def date_window(dates: np.ndarray, start: Optional[date], end: Optional[date]) -> slice:
+    """Index range of ``dates`` within ``[start, end]``; a ``None`` bound is open."""
+
+    lo, hi = 0, len(dates)
+    if start is not None:
+        lo = int(np.searchsorted(dates, np.datetime64(start, "D"), side="left"))
+    if end is not None:
+        hi = int(np.searchsorted(dates, np.datetime64(end, "D"), side="right"))
+    return slice(lo, max(lo, hi))
+
+
+def _optional(values: np.ndarray) -> List[Optional[float]]:
+    return [None if math.isnan(v) else v for v in values.tolist()]
+
+
+def to_rows(columns: Dict[str, np.ndarray]) -> List[Dict]:
+    iso_dates = np.datetime_as_string(columns["date"], unit="D").tolist()
+    return [
+        {"date": date_str, "close": close, "ma20": ma20, "ma60": ma60, "ma200": ma200}
+        for date_str, close, ma20, ma60, ma200 in zip(
+            iso_dates,
+            columns["close"].tolist(),
+            _optional(columns["ma20"]),
+            _optional(columns["ma60"]),
+            _optional(columns["ma200"]),
+        )
+    ]
+
+
+def encode(columns: Dict[str, np.ndarray], fmt: str) -> SerializedBody:
+    if fmt == "rows":
+        body = dumps_json(to_rows(columns))
+    elif fmt == "columnar":
+        payload = {"date": np.datetime_as_string(columns["date"], unit="D").tolist()}
+        payload["close"] = columns["close"].tolist()
+        for name in VALUE_COLUMNS[1:]:
+            payload[name] = _optional(columns[name])
+        body = dumps_json(payload)
+    elif fmt == "f32":
+        count = len(columns["date"])
+        parts = [struct.pack("<I", count), columns["date"].astype("<i4").tobytes()]
+        parts.extend(columns[name].astype("<f4").tobytes() for name in VALUE_COLUMNS)
+        body = b"".join(parts)
+    else:
+        raise ValueError(f"Unknown price series format: {fmt}")
+    return SerializedBody.from_bytes(body, MEDIA_TYPES[fmt])
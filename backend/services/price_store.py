@@ -0,0 +1,74 @@
+import logging
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import date
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+
+class PriceHistoryStore:
+    """SQLite-backed (date, close) history keyed by symbol and price type.
+
+    Lets a cold process start from disk and lets refreshes download only the
+    trailing days that are not stored yet.
+    """
+
+    def __init__(self, directory: str, filename: str = "price_history.sqlite3"):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, filename)
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS price_history (
+                    symbol TEXT NOT NULL,
+                    price_type TEXT NOT NULL,
+                    date TEXT NOT NULL,
+                    close REAL NOT NULL,
+                    PRIMARY KEY (symbol, price_type, date)
+                )
+                """
+            )
+        logger.info("[PRICE STORE] path=%s", self.path)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def bounds(self, symbol: str, price_type: str) -> Tuple[Optional[date], Optional[date]]:
+        with self._lock, self._connect() as conn:
+            first, last = conn.execute(
+                "SELECT MIN(date), MAX(date) FROM price_history WHERE symbol = ? AND price_type = ?",
+                (symbol, price_type),
+            ).fetchone()
+        if first is None:
+            return None, None
+        return date.fromisoformat(first), date.fromisoformat(last)
+
+    def load(self, symbol: str, price_type: str, start: date, end: date) -> List[Tuple[str, float]]:
+        with self._lock, self._connect() as conn:
+            rows = conn.execute(
+                """
+                SELECT date, close FROM price_history
+                WHERE symbol = ? AND price_type = ? AND date BETWEEN ? AND ?
+                ORDER BY date
+                """,
+                (symbol, price_type, start.isoformat(), end.isoformat()),
+            ).fetchall()
+        return [(d, float(close)) for d, close in rows]
+
+    def upsert(self, symbol: str, price_type: str, rows: Iterable[Tuple[str, float]]) -> None:
+        with self._lock, self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO price_history (symbol, price_type, date, close) VALUES (?, ?, ?, ?)",
+                [(symbol, price_type, d, float(close)) for d, close in rows],
+            )
@@ -0,0 +1,49 @@
+import hashlib
+import json
+from dataclasses import dataclass
+from typing import Any, Optional
+
+try:  # orjson は任意依存（無ければ標準 json で同じ内容を出力する）
+    import orjson
+except ImportError:  # pragma: no cover - exercised only without orjson installed
+    orjson = None
+
+
+def dumps_json(value: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+@dataclass(frozen=True)
+class SerializedBody:
+    """A response body encoded once, with a strong ETag derived from its bytes."""
+
+    body: bytes
+    etag: str
+    media_type: str = "application/json"
+
+    @classmethod
+    def json(cls, value: Any) -> "SerializedBody":
+        return cls.from_bytes(dumps_json(value))
+
+    @classmethod
+    def from_bytes(cls, body: bytes, media_type: str = "application/json") -> "SerializedBody":
+        digest = hashlib.blake2b(body, digest_size=16).hexdigest()
+        return cls(body, f'"{digest}"', media_type)
+
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        """True when an ``If-None-Match`` header already names this body."""
+
+        if not if_none_match:
+            return False
+        for tag in if_none_match.split(","):
+            tag = tag.strip()
+            if tag == "*":
+                return True
+            # If-None-Match は弱い比較（W/ プレフィックスを無視）
+            if tag.startswith("W/"):
+                tag = tag[2:]
+            if tag == self.etag:
+                return True
+        return False
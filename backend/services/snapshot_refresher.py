@@ -0,0 +1,165 @@
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RefreshStatus:
+    last_attempt_at: Optional[str] = None
+    last_success_at: Optional[str] = None
+    last_duration_ms: Optional[float] = None
+    consecutive_failures: int = 0
+    total_failures: int = 0
+    last_error: Optional[str] = None
+    next_run_at: Optional[str] = None
+
+
+class SnapshotRefresher:
+    """Daemon thread that keeps per-key snapshots warm so requests only read memory.
+
+    Every key is refreshed on ``interval`` plus up to ``jitter`` of random
+    delay (so keys and processes do not hit the data sources in lockstep).
+    A failing key backs off exponentially up to ``max_backoff``.  Keys
+    falling due within one jitter span are refreshed together, after
+    ``before_batch`` (e.g. a batched download) has been called with them;
+    the batch fans out over ``max_workers`` threads so a slow key only
+    delays the keys queued behind it when every worker is busy.
+    """
+
+    MIN_BATCH_WINDOW_SECONDS = 5.0
+
+    def __init__(
+        self,
+        keys: List[str],
+        refresh: Callable[[str], object],
+        interval: timedelta,
+        jitter: timedelta = timedelta(seconds=0),
+        max_backoff: timedelta = timedelta(minutes=10),
+        name: str = "snapshot-refresher",
+        rng: Optional[random.Random] = None,
+        before_batch: Optional[Callable[[List[str]], object]] = None,
+        max_workers: int = 4,
+    ):
+        self.keys = list(keys)
+        self.refresh = refresh
+        self.before_batch = before_batch
+        self.interval = interval.total_seconds()
+        self.jitter = jitter.total_seconds()
+        self.max_backoff = max_backoff.total_seconds()
+        self.name = name
+        self._rng = rng or random.Random()
+        self._lock = threading.Lock()
+        self._status: Dict[str, RefreshStatus] = {key: RefreshStatus() for key in self.keys}
+        self._next_run: Dict[str, float] = {key: 0.0 for key in self.keys}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._max_workers = max(1, max_workers)
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self._max_workers, thread_name_prefix=f"{self.name}-worker"
+                )
+            return self._executor
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+        logger.info(
+            "[%s] started keys=%s interval=%.0fs jitter=%.0fs",
+            self.name,
+            self.keys,
+            self.interval,
+            self.jitter,
+        )
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def status(self) -> Dict[str, Dict]:
+        with self._lock:
+            return {key: asdict(status) for key, status in self._status.items()}
+
+    def _delay_after(self, failures: int) -> float:
+        if failures == 0:
+            delay = self.interval
+        else:
+            delay = min(self.interval * (2 ** failures), self.max_backoff)
+        return delay + self._rng.uniform(0, self.jitter)
+
+    def run_once(self, key: str) -> bool:
+        """Refresh ``key`` now, record its status and schedule its next run."""
+
+        started_at = datetime.now(timezone.utc)
+        started = time.monotonic()
+        error: Optional[Exception] = None
+        try:
+            self.refresh(key)
+        except Exception as exc:  # keep refreshing other keys
+            error = exc
+            logger.warning("[%s] refresh failed for %s (%s)", self.name, key, exc)
+        duration = time.monotonic() - started
+
+        with self._lock:
+            status = self._status[key]
+            status.last_attempt_at = started_at.isoformat()
+            status.last_duration_ms = round(duration * 1000, 1)
+            if error is None:
+                status.last_success_at = started_at.isoformat()
+                status.consecutive_failures = 0
+                status.last_error = None
+            else:
+                status.consecutive_failures += 1
+                status.total_failures += 1
+                status.last_error = str(error)
+            delay = self._delay_after(status.consecutive_failures)
+            self._next_run[key] = time.monotonic() + delay
+            status.next_run_at = (datetime.now(timezone.utc) + timedelta(seconds=delay)).isoformat()
+        return error is None
+
+    def run_batch(self, keys: List[str]) -> None:
+        if self.before_batch is not None and keys:
+            try:
+                self.before_batch(keys)
+            except Exception as exc:
+                logger.warning("[%s] batch preparation failed for %s (%s)", self.name, keys, exc)
+        if self._stop.is_set() or not keys:
+            return
+        pool = self._pool()
+        # run_once は例外を外に出さないので、全キーの完了を待つだけでよい
+        wait([pool.submit(self.run_once, key) for key in keys])
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            horizon = time.monotonic()
+            with self._lock:
+                if any(run_at <= horizon for run_at in self._next_run.values()):
+                    # 更新の所要時間ぶん期限がずれても同じバッチにまとめる
+                    horizon += max(self.jitter, self.MIN_BATCH_WINDOW_SECONDS)
+                due = [key for key in self.keys if self._next_run[key] <= horizon]
+            self.run_batch(due)
+            if self._stop.is_set():
+                return
+            with self._lock:
+                delay = min(self._next_run.values()) - time.monotonic()
+            self._stop.wait(max(delay, 0.1))
@@ -1,14 +1,22 @@
 import logging
 import os
-import random
-from datetime import date, timedelta
-from typing import List, Optional, Tuple
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
 
-import requests
+import numpy as np
 import pandas as pd
 import yfinance as yf
 from dotenv import load_dotenv
 
+from domain.price_series import MEMOIZED_MA_WINDOWS, PriceSeries, as_price_series
+
+from . import synthetic
+from .cache import SingleFlightCache
+from .fx_service import FxRateProvider
+from .http_session import default_timeout, shared_session
+from .price_series_formats import to_rows
+from .price_store import PriceHistoryStore
+
 
 logger = logging.getLogger(__name__)
 
@@ -16,8 +24,20 @@ logger = logging.getLogger(__name__)
 class SP500MarketService:
     """Service that fetches live pricing via yfinance with an optional synthetic fallback."""
 
-    def __init__(self, symbol: Optional[str] = None):
+    # 保存済み履歴の先頭がこの日数以内なら、期間の先頭までカバー済みとみなす（休場日の吸収）
+    STORE_START_TOLERANCE_DAYS = 10
+    # 差分取得時に取り直す末尾の日数
+    STORE_REFRESH_OVERLAP_DAYS = 5
+
+    def __init__(
+        self,
+        symbol: Optional[str] = None,
+        price_store: Optional[PriceHistoryStore] = None,
+        fx_provider: Optional[FxRateProvider] = None,
+    ):
         load_dotenv()
+        # USD/JPY は NAV サービスなどとも共有するプロバイダから取得する
+        self.fx = fx_provider or FxRateProvider()
         self.symbol_map = {
             "SP500": symbol or os.getenv("SP500_SYMBOL", "^GSPC"),
             "TOPIX": os.getenv("TOPIX_SYMBOL", "1306.T"),
@@ -46,6 +66,10 @@ class SP500MarketService:
             "sp500_jpy": "index_jpy",
         }
 
+        # NAV API への接続は keep-alive で使い回し、一時的な失敗は再試行してから諦める
+        self.http = shared_session("nav")
+        self.http_timeout = default_timeout()
+
         self.nav_api_map = {
             "SP500": os.getenv("SP500_NAV_API_BASE"),
             "TOPIX": os.getenv("TOPIX_NAV_API_BASE"),
@@ -73,12 +97,25 @@ class SP500MarketService:
             "sp500_jpy": 4000.0,
         }
 
+        # 取得済み履歴の永続ストア（PRICE_STORE_DIR 指定時のみ有効）
+        store_dir = os.getenv("PRICE_STORE_DIR")
+        if price_store is None and store_dir:
+            price_store = PriceHistoryStore(store_dir)
+        self.price_store = price_store
+        # 直近5年分の履歴（指数ごと）。warm_price_histories の一括取得結果もここに入る
+        self._history_cache = SingleFlightCache(ttl=timedelta(seconds=60), name="price-history")
+        # 日中の現在値は日次履歴と切り離し、短い TTL で個別にキャッシュする
+        self._quote_cache = SingleFlightCache(
+            ttl=timedelta(seconds=float(os.getenv("QUOTE_TTL_SECONDS", "15"))), name="quote"
+        )
+
         logger.info(
-            "[MARKET CONFIG] symbols=%s fx_symbols=%s fallback=%s price_types=%s",
+            "[MARKET CONFIG] symbols=%s fx_symbols=%s fallback=%s price_types=%s price_store=%s",
             self.symbol_map,
             self.fx_symbol_map,
             self.allow_synth_map,
             self.price_type_map,
+            self.price_store.path if self.price_store else None,
         )
 
     def _extract_close_series(self, hist: pd.DataFrame) -> pd.Series:
@@ -123,21 +160,49 @@ class SP500MarketService:
             raise ValueError(f"empty history for {symbol}")
         return closes
 
+    def _combine_jpy(self, idx_close: pd.Series, fx_close: pd.Series) -> List[Tuple[str, float]]:
+        combined = pd.concat(
+            [idx_close.rename("close_usd"), fx_close.rename("usdjpy")], axis=1, join="inner"
+        ).dropna()
+        if combined.empty:
+            raise ValueError("no overlapping dates for index and fx")
+
+        combined["close"] = combined["close_usd"] * combined["usdjpy"]
+        return [(self._to_iso_date(idx), round(float(val), 2)) for idx, val in combined["close"].items()]
+
+    def _download_close_frame(self, symbols: List[str], start: date, end: date) -> Dict[str, pd.Series]:
+        """複数シンボルを1回の yf.download で取得し、シンボルごとの終値系列に分ける。"""
+
+        hist = yf.download(
+            symbols, start=start, end=end + timedelta(days=1), interval="1d", group_by="column"
+        )
+        close = hist.get("Close")
+        if close is None:
+            close = hist.get("Adj Close")
+        if close is None:
+            raise ValueError("close column missing")
+        if isinstance(close, pd.Series):
+            close = close.to_frame(symbols[0])
+
+        frames: Dict[str, pd.Series] = {}
+        for symbol in symbols:
+            if symbol not in close.columns:
+                continue
+            # 市場ごとに休場日が違うので、行ごとではなく列ごとに欠損を落とす
+            closes = close[symbol].dropna()
+            if not closes.empty:
+                frames[symbol] = closes
+        return frames
+
     def _fetch_index_history_jpy(self, start: date, end: date, index_type: str) -> List[Tuple[str, float]]:
         symbol = self._resolve_symbol(index_type)
         fx_symbol = self._resolve_fx_symbol(index_type)
         if not fx_symbol:
             raise ValueError("fx_symbol required for index_jpy")
 
-        idx_close = self._download_close_series(symbol, start, end).rename("close_usd")
-        fx_close = self._download_close_series(fx_symbol, start, end).rename("usdjpy")
-
-        combined = pd.concat([idx_close, fx_close], axis=1, join="inner").dropna()
-        if combined.empty:
-            raise ValueError("no overlapping dates for index and fx")
-
-        combined["close"] = combined["close_usd"] * combined["usdjpy"]
-        series = [(self._to_iso_date(idx), round(float(val), 2)) for idx, val in combined["close"].items()]
+        idx_close = self._download_close_series(symbol, start, end)
+        fx_close = self.fx.history(fx_symbol, start, end)
+        series = self._combine_jpy(idx_close, fx_close)
         logger.info(
             "Using yfinance history for %s (symbol=%s fx_symbol=%s price_type=%s points=%d)",
             index_type,
@@ -159,7 +224,7 @@ class SP500MarketService:
         price_type = self._resolve_price_type(index_type)
 
         try:
-            resp = requests.get(
+            resp = self.http.get(
                 f"{nav_base.rstrip('/')}/history",
                 params={
                     "symbol": symbol,
@@ -167,13 +232,14 @@ class SP500MarketService:
                     "end": end.isoformat(),
                     "price_type": price_type,
                 },
-                timeout=10,
+                timeout=self.http_timeout,
             )
             resp.raise_for_status()
             data = resp.json()
             if isinstance(data, list) and data:
+                # 日付は "2024/01/05" やオフセット付きの日時でも現地の暦日に揃える
                 series = [
-                    (str(item["date"]), float(item["close"]))
+                    (pd.Timestamp(item["date"]).date().isoformat(), float(item["close"]))
                     for item in data
                     if "date" in item and "close" in item
                 ]
@@ -209,26 +275,17 @@ class SP500MarketService:
         annual_drift = annual_drift_map.get(index_type, 0.05)
         daily_drift = annual_drift / 260.0
 
-        rng_seed = f"{index_type}:{start.isoformat()}:{end.isoformat()}"
-        rng = random.Random(rng_seed)
-
-        history: List[Tuple[str, float]] = []
-        price = self.start_prices.get(index_type, 4000.0)
-
-        current = start
-        while current <= end:
-            if current.weekday() < 5:  # 月〜金のみ
-                noise = rng.uniform(-0.006, 0.006)  # ±0.6% 程度の揺らぎ
-                # 半年ごとに5%程度の調整を入れて drawdown を作る
-                if (current.timetuple().tm_yday // 182) % 2 == 1:
-                    noise -= 0.002
-
-                daily_change = 1 + daily_drift + noise
-                price = max(1.0, price * daily_change)
-                history.append((current.isoformat(), round(price, 2)))
-            current += timedelta(days=1)
-
-        return history
+        # 営業日ごとの ±0.6% 程度の揺らぎを一括で生成し、半年ごとに調整を入れて drawdown を作る
+        dates, prices = synthetic.drifting_prices(
+            start,
+            end,
+            start_price=self.start_prices.get(index_type, 4000.0),
+            daily_drift=daily_drift,
+            noise=0.006,
+            seed_tag=f"{index_type}:{start.isoformat()}:{end.isoformat()}",
+            drawdown=0.002,
+        )
+        return synthetic.to_iso_rows(dates, prices, 2)
 
     def _to_iso_date(self, idx) -> str:
         try:
@@ -240,36 +297,175 @@ class SP500MarketService:
             except Exception:
                 return str(idx)
 
-    def get_price_history(self, index_type: str = "SP500") -> List[Tuple[str, float]]:
-        today = date.today()
-        start = today - timedelta(days=365 * 5)
-        allow_synth = self._allow_synthetic_for_index(index_type)
-        try:
-            price_type = self._resolve_price_type(index_type)
-            if price_type == "index_jpy":
-                return self._fetch_index_history_jpy(start, today, index_type)
+    def _fetch_history(self, start: date, end: date, index_type: str) -> List[Tuple[str, float]]:
+        """外部ソース（円換算 / NAV API / yfinance）から履歴を取得する。失敗時は例外。"""
 
-            nav_hist = self._fetch_nav_history(start, today, index_type)
-            if nav_hist:
-                logger.info(
-                    "Using NAV history for %s (symbol=%s price_type=%s points=%d)",
-                    index_type,
-                    self._resolve_symbol(index_type),
-                    price_type,
-                    len(nav_hist),
-                )
-                return [(d, round(v, 2)) for d, v in nav_hist]
+        price_type = self._resolve_price_type(index_type)
+        if price_type == "index_jpy":
+            return self._fetch_index_history_jpy(start, end, index_type)
 
-            symbol = self._resolve_symbol(index_type)
-            closes = self._download_close_series(symbol, start, today)
+        nav_hist = self._fetch_nav_history(start, end, index_type)
+        if nav_hist:
             logger.info(
-                "Using yfinance history for %s (symbol=%s price_type=%s points=%d)",
+                "Using NAV history for %s (symbol=%s price_type=%s points=%d)",
                 index_type,
-                symbol,
+                self._resolve_symbol(index_type),
                 price_type,
-                len(closes),
+                len(nav_hist),
+            )
+            return [(d, round(v, 2)) for d, v in nav_hist]
+
+        symbol = self._resolve_symbol(index_type)
+        closes = self._download_close_series(symbol, start, end)
+        logger.info(
+            "Using yfinance history for %s (symbol=%s price_type=%s points=%d)",
+            index_type,
+            symbol,
+            price_type,
+            len(closes),
+        )
+        return [(self._to_iso_date(idx), round(float(val), 2)) for idx, val in closes.items()]
+
+    def _store_key(self, index_type: str) -> Optional[Tuple[str, str]]:
+        # NAV API は独自ソースのため保存対象外（yfinance 系列と混ざらないようにする）
+        if self.price_store is None or self._resolve_nav_base(index_type):
+            return None
+        symbol = self._resolve_symbol(index_type)
+        price_type = self._resolve_price_type(index_type) or "index"
+        fx_symbol = self._resolve_fx_symbol(index_type)
+        if price_type == "index_jpy" and fx_symbol:
+            symbol = f"{symbol}*{fx_symbol}"
+        return symbol, price_type
+
+    def _incremental_start(self, key: Tuple[str, str], start: date) -> Tuple[date, bool]:
+        """(取得開始日, 保存済み履歴が期間の先頭をカバーしているか)"""
+
+        stored_first, stored_last = self.price_store.bounds(*key)
+        covered = stored_first is not None and stored_first <= start + timedelta(
+            days=self.STORE_START_TOLERANCE_DAYS
+        )
+        if not covered:
+            return start, False
+        # 直近数日は取り直す（当日の暫定値や訂正を上書きするため）
+        return max(start, stored_last - timedelta(days=self.STORE_REFRESH_OVERLAP_DAYS)), True
+
+    def _fetch_history_with_store(
+        self, start: date, end: date, index_type: str
+    ) -> List[Tuple[str, float]]:
+        """保存済みの履歴に、末尾の不足分だけを取得して追記してから返す。"""
+
+        key = self._store_key(index_type)
+        if key is None:
+            return self._fetch_history(start, end, index_type)
+
+        symbol, price_type = key
+        fetch_start, covered = self._incremental_start(key, start)
+        if not covered:
+            fresh = self._fetch_history(start, end, index_type)
+            self.price_store.upsert(symbol, price_type, fresh)
+            return self.price_store.load(symbol, price_type, start, end)
+
+        try:
+            fresh = self._fetch_history(fetch_start, end, index_type)
+            self.price_store.upsert(symbol, price_type, fresh)
+        except Exception as exc:
+            logger.warning(
+                "Incremental history fetch failed for %s, serving stored history (%s)",
+                index_type,
+                exc,
             )
-            return [(self._to_iso_date(idx), round(float(val), 2)) for idx, val in closes.items()]
+        history = self.price_store.load(symbol, price_type, start, end)
+        logger.info(
+            "Using stored history for %s (symbol=%s price_type=%s points=%d fetched_from=%s)",
+            index_type,
+            symbol,
+            price_type,
+            len(history),
+            fetch_start.isoformat(),
+        )
+        return history
+
+    def _history_window(self) -> Tuple[date, date]:
+        today = date.today()
+        return today - timedelta(days=365 * 5), today
+
+    def warm_price_histories(self, index_types: List[str]) -> Dict[str, PriceSeries]:
+        """yfinance 系の指数・為替をまとめて1回でダウンロードし、指数ごとの履歴キャッシュを温める。
+
+        共有されるシンボル（JPY=X など）は1回だけ取得する。NAV API を使う指数や、
+        一括取得で系列が得られなかった指数は対象外とし、通常の個別取得に任せる。
+        """
+
+        start, today = self._history_window()
+        plans = {}
+        for index_type in dict.fromkeys(index_types):
+            if self._resolve_nav_base(index_type):
+                continue
+            symbols = [self._resolve_symbol(index_type)]
+            if self._resolve_price_type(index_type) == "index_jpy":
+                fx_symbol = self._resolve_fx_symbol(index_type)
+                if not fx_symbol:
+                    continue
+                symbols.append(fx_symbol)
+            key = self._store_key(index_type)
+            fetch_start = self._incremental_start(key, start)[0] if key else start
+            plans[index_type] = (symbols, fetch_start)
+        if not plans:
+            return {}
+
+        all_symbols = list(dict.fromkeys(sym for symbols, _ in plans.values() for sym in symbols))
+        batch_start = min(fetch_start for _, fetch_start in plans.values())
+        try:
+            frames = self._download_close_frame(all_symbols, batch_start, today)
+        except Exception as exc:
+            logger.warning("Batched history download failed (%s)", exc, exc_info=True)
+            return {}
+        logger.info(
+            "Batched yfinance history download (symbols=%s start=%s indexes=%d)",
+            all_symbols,
+            batch_start.isoformat(),
+            len(plans),
+        )
+
+        # 為替系列は個別取得の経路（_fetch_index_history_jpy）とも共有する
+        for index_type, (symbols, _) in plans.items():
+            if len(symbols) == 2 and symbols[1] in frames:
+                self.fx.put_history(symbols[1], batch_start, today, frames[symbols[1]])
+
+        warmed: Dict[str, PriceSeries] = {}
+        for index_type, (symbols, fetch_start) in plans.items():
+            try:
+                closes = [frames[sym] for sym in symbols]
+                closes = [c[c.index >= pd.Timestamp(fetch_start)] for c in closes]
+                if len(closes) == 2:
+                    fresh = self._combine_jpy(closes[0], closes[1])
+                else:
+                    fresh = [(self._to_iso_date(idx), round(float(val), 2)) for idx, val in closes[0].items()]
+                if not fresh:
+                    raise ValueError("empty history")
+                key = self._store_key(index_type)
+                if key:
+                    self.price_store.upsert(*key, fresh)
+                    fresh = self.price_store.load(*key, start, today)
+            except Exception as exc:
+                logger.info("Batched history unavailable for %s (%s)", index_type, exc)
+                continue
+            series = as_price_series(fresh)
+            self._history_cache.put(index_type, series)
+            warmed[index_type] = series
+        return warmed
+
+    def get_price_history(self, index_type: str = "SP500") -> PriceSeries:
+        return self._history_cache.get(
+            index_type, lambda: self._load_price_history(index_type)
+        )
+
+    # PriceSeries への変換も取得の一部として扱い、失敗時は他の取得失敗と同じくフォールバックする
+    def _load_price_history(self, index_type: str) -> PriceSeries:
+        start, today = self._history_window()
+        allow_synth = self._allow_synthetic_for_index(index_type)
+        try:
+            return as_price_series(self._fetch_history_with_store(start, today, index_type))
         except Exception as exc:
             logger.warning("Price history fetch failed (%s)", exc, exc_info=True)
             if not allow_synth:
@@ -282,43 +478,20 @@ class SP500MarketService:
                 self._resolve_price_type(index_type),
                 len(fallback),
             )
-            return fallback
+            return as_price_series(fallback)
 
     def get_price_history_range(
         self, start: date, end: date, allow_fallback: bool = True, index_type: str = "SP500"
-    ) -> List[Tuple[str, float]]:
+    ) -> PriceSeries:
+        return self._load_price_history_range(start, end, allow_fallback, index_type)
+
+    def _load_price_history_range(
+        self, start: date, end: date, allow_fallback: bool, index_type: str
+    ) -> PriceSeries:
         allow_synth = self._allow_synthetic_for_index(index_type)
         fallback_allowed = allow_fallback and allow_synth
         try:
-            price_type = self._resolve_price_type(index_type)
-            if price_type == "index_jpy":
-                return self._fetch_index_history_jpy(start, end, index_type)
-
-            nav_hist = self._fetch_nav_history(start, end, index_type)
-            if nav_hist:
-                logger.info(
-                    "Using NAV history for %s (symbol=%s price_type=%s points=%d)",
-                    index_type,
-                    self._resolve_symbol(index_type),
-                    price_type,
-                    len(nav_hist),
-                )
-                return [(d, round(v, 2)) for d, v in nav_hist]
-
-            symbol = self._resolve_symbol(index_type)
-            hist = yf.download(symbol, start=start, end=end + timedelta(days=1), interval="1d")
-            hist = hist.dropna()
-            if hist.empty:
-                raise ValueError("empty history")
-            closes = self._extract_close_series(hist)
-            logger.info(
-                "Using yfinance history for %s (symbol=%s price_type=%s points=%d)",
-                index_type,
-                symbol,
-                price_type,
-                len(closes),
-            )
-            return [(self._to_iso_date(idx), round(float(val), 2)) for idx, val in closes.items()]
+            return as_price_series(self._fetch_history(start, end, index_type))
         except Exception as exc:
             logger.warning("Price history fetch failed (%s)", exc, exc_info=True)
             if not fallback_allowed:
@@ -331,17 +504,13 @@ class SP500MarketService:
                 self._resolve_price_type(index_type),
                 len(fallback),
             )
-            return fallback
+            return as_price_series(fallback)
 
     def get_usd_jpy(self) -> float:
         try:
-            fx = yf.download("JPY=X", period="5d", interval="1d")
-            fx = fx.dropna()
-            if not fx.empty:
-                return round(float(fx["Close"].iloc[-1]), 4)
+            return self.fx.latest("JPY=X")[0]
         except Exception:
-            pass
-        return 150.0
+            return 150.0
 
     def get_fund_nav_jpy(self, sp_price_usd: float, usd_jpy: float) -> float:
         """
@@ -365,30 +534,8 @@ class SP500MarketService:
     def get_current_price(
         self, history: Optional[List[Tuple[str, float]]] = None, index_type: str = "SP500"
     ) -> float:
-        price_type = self._resolve_price_type(index_type)
         try:
-            if price_type == "index_jpy":
-                symbol = self._resolve_symbol(index_type)
-                fx_symbol = self._resolve_fx_symbol(index_type)
-                ticker = yf.Ticker(symbol)
-                fx_ticker = yf.Ticker(fx_symbol) if fx_symbol else None
-                live = ticker.fast_info.get("lastPrice") if ticker.fast_info else None
-                fx_live = fx_ticker.fast_info.get("lastPrice") if fx_ticker and fx_ticker.fast_info else None
-                if live and fx_live:
-                    return round(float(live) * float(fx_live), 2)
-
-                hist = ticker.history(period="5d", interval="1d")
-                fx_hist = fx_ticker.history(period="5d", interval="1d") if fx_ticker else None
-                if not hist.empty and fx_hist is not None and not fx_hist.empty:
-                    return round(float(hist["Close"].iloc[-1]) * float(fx_hist["Close"].iloc[-1]), 2)
-            else:
-                ticker = yf.Ticker(self._resolve_symbol(index_type))
-                live = ticker.fast_info.get("lastPrice") if ticker.fast_info else None
-                if live:
-                    return round(float(live), 2)
-                hist = ticker.history(period="5d", interval="1d")
-                if not hist.empty:
-                    return round(float(hist["Close"].iloc[-1]), 2)
+            return self.get_live_price(index_type)
         except Exception:
             pass
 
@@ -398,36 +545,68 @@ class SP500MarketService:
         synthetic = self._fallback_history(today - timedelta(days=30), today, index_type)
         return synthetic[-1][1]
 
-    def build_price_series_with_ma(self, history: List[Tuple[str, float]]):
-        closes = [p[1] for p in history]
-        dates = [p[0] for p in history]
-
-        def moving_avg(window: int) -> List[Optional[float]]:
-            results: List[Optional[float]] = []
-            running_sum = 0.0
-            for i, price in enumerate(closes):
-                running_sum += price
-                if i >= window:
-                    running_sum -= closes[i - window]
-                if i + 1 >= window:
-                    results.append(round(running_sum / window, 2))
-                else:
-                    results.append(None)
-            return results
-
-        ma20 = moving_avg(20)
-        ma60 = moving_avg(60)
-        ma200 = moving_avg(200)
-
-        series = []
-        for idx, date_str in enumerate(dates):
-            series.append(
-                {
-                    "date": date_str,
-                    "close": closes[idx],
-                    "ma20": ma20[idx],
-                    "ma60": ma60[idx],
-                    "ma200": ma200[idx],
-                }
-            )
-        return series
+    def get_live_price(self, index_type: str = "SP500") -> float:
+        """Intraday price, cached for ``QUOTE_TTL_SECONDS``; raises when no live price is available."""
+
+        quote = self.get_quote(index_type)
+        if quote["source"] != "live":
+            raise ValueError(f"no live price for {index_type}")
+        return quote["price"]
+
+    def get_quote(self, index_type: str = "SP500") -> Dict:
+        """Latest price for display: the live quote, or the last daily close when it is unavailable.
+
+        The result (including the close fallback) is cached for ``QUOTE_TTL_SECONDS``
+        so polling while offline does not hit yfinance on every request.
+        """
+
+        return dict(self._quote_cache.get(index_type, lambda: self._build_quote(index_type)))
+
+    def _build_quote(self, index_type: str) -> Dict:
+        try:
+            return self._fetch_live_quote(index_type)
+        except Exception as exc:
+            logger.info("Live quote unavailable for %s (%s)", index_type, exc)
+        date_str, close = self.get_price_history(index_type)[-1]
+        return {"price": close, "source": "close", "as_of": date_str}
+
+    def _fetch_live_quote(self, index_type: str) -> Dict:
+        ticker = yf.Ticker(self._resolve_symbol(index_type))
+        fx_rate, fx_as_of, fx_source = 1.0, None, "live"
+        if self._resolve_price_type(index_type) == "index_jpy":
+            fx_symbol = self._resolve_fx_symbol(index_type)
+            if not fx_symbol:
+                raise ValueError("fx_symbol required for index_jpy")
+            fx_rate, fx_as_of, fx_source = self.fx.live(fx_symbol)
+
+        live = ticker.fast_info.get("lastPrice") if ticker.fast_info else None
+        if live:
+            price = round(float(live) * fx_rate, 2)
+            if fx_source == "live":
+                return {"price": price, "source": "live", "as_of": datetime.now(timezone.utc).isoformat()}
+            # 為替が終値のときは日中値として扱わず、為替レートの日付を付ける
+            return {"price": price, "source": "close", "as_of": fx_as_of}
+        # 日中値が無いときは直近の日足終値（日付はその足のもの）
+        closes = ticker.history(period="5d", interval="1d")["Close"].dropna()
+        if closes.empty:
+            raise ValueError(f"no live price for {index_type}")
+        return {
+            "price": round(float(closes.iloc[-1]) * fx_rate, 2),
+            "source": "close",
+            "as_of": self._to_iso_date(closes.index[-1]),
+        }
+
+    CHART_MA_WINDOWS = MEMOIZED_MA_WINDOWS
+
+    def build_price_columns(self, history) -> Dict[str, np.ndarray]:
+        """チャート用の列（date / close / MA20・60・200）。MA は PriceSeries のキャッシュ済み列から作る。"""
+
+        series = as_price_series(history)
+        columns = {"date": series.dates, "close": series.closes}
+        for window in self.CHART_MA_WINDOWS:
+            ma = series.moving_average(window)
+            columns[f"ma{window}"] = np.array([round(v, 2) for v in ma.tolist()], dtype=float)
+        return columns
+
+    def build_price_series_with_ma(self, history) -> List[Dict]:
+        return to_rows(self.build_price_columns(history))
@@ -0,0 +1,73 @@
+"""Vectorized synthetic histories for offline fallbacks, tests and benchmarks.
+
+Series are built on NumPy business-day ranges (Mon-Fri) from a
+``numpy.random.Generator`` seeded by a string tag, so the same tag always
+yields the same series across processes.
+"""
+
+import hashlib
+from datetime import date
+from typing import List, Tuple
+
+import numpy as np
+
+
+def seeded_generator(seed_tag: str) -> np.random.Generator:
+    # hash() は起動ごとに変わるため、タグのダイジェストから種を作る
+    digest = hashlib.blake2b(seed_tag.encode("utf-8"), digest_size=16).digest()
+    return np.random.default_rng(int.from_bytes(digest, "little"))
+
+
+def business_days(start: date, end: date) -> np.ndarray:
+    """Mon-Fri dates in ``[start, end]`` as ``datetime64[D]``."""
+
+    days = np.arange(np.datetime64(start, "D"), np.datetime64(end, "D") + 1, dtype="datetime64[D]")
+    return days[np.is_busday(days)]
+
+
+def day_of_year(dates: np.ndarray) -> np.ndarray:
+    """1-based day of year (``timetuple().tm_yday``) for ``datetime64[D]`` dates."""
+
+    return (dates - dates.astype("datetime64[Y]")).astype(np.int64) + 1
+
+
+def drifting_prices(
+    start: date,
+    end: date,
+    start_price: float,
+    daily_drift: float,
+    noise: float,
+    seed_tag: str,
+    drawdown: float = 0.0,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Compounded business-day prices ``(dates, closes)`` with uniform ``±noise`` daily moves.
+
+    ``drawdown`` is subtracted from the daily move in the second half of each
+    year (day 182 onwards) so the path has recurring corrections.  The 1.0
+    price floor is applied to the finished path, so once it is hit the path
+    differs from one that compounds step by step from the clamped price.
+    """
+
+    dates = business_days(start, end)
+    changes = 1.0 + daily_drift + seeded_generator(seed_tag).uniform(-noise, noise, len(dates))
+    if drawdown:
+        changes -= drawdown * ((day_of_year(dates) // 182) % 2 == 1)
+    # 価格は 1.0 を下限とする
+    prices = np.maximum(1.0, start_price * np.cumprod(changes))
+    return dates, prices
+
+
+def random_walk(count: int, base: float, variance: float, seed_tag: str) -> np.ndarray:
+    """``count`` steps of a walk from ``base`` with uniform ``±variance`` increments."""
+
+    return base + np.cumsum(seeded_generator(seed_tag).uniform(-variance, variance, count))
+
+
+def to_iso_rows(dates: np.ndarray, values: np.ndarray, digits: int) -> List[Tuple[str, float]]:
+    return list(
+        zip(np.datetime_as_string(dates, unit="D").tolist(), np.round(values, digits).tolist())
+    )
+
+
+def to_date_rows(dates: np.ndarray, values: np.ndarray, digits: int) -> List[Tuple[date, float]]:
+    return list(zip(dates.tolist(), np.round(values, digits).tolist()))
@@ -0,0 +1,17 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+@pytest.fixture
+def fresh_components(monkeypatch):
+    """Empty snapshot component caches (and technical memo) on ``main`` for one test."""
+
+    import main
+
+    for name in ("_prices_cache", "_chart_cache", "_nav_cache", "_macro_cache", "_events_cache"):
+        monkeypatch.setattr(main, name, main.SingleFlightCache(ttl=main.timedelta(minutes=1)))
+    monkeypatch.setattr(main, "_technical_memo", main.SingleFlightCache(ttl=main.timedelta(hours=1)))
@@ -3,6 +3,8 @@ import os
 import sys
 from datetime import date, timedelta
 
+import pytest
+
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from services.backtest_service import BacktestService
@@ -49,3 +51,78 @@ def test_backtest_generates_buy_and_sell_cycle():
     # 10株を100で買い200で売る想定 → 2000円前後の評価
     assert result["final_value"] >= 2000.0
     assert result["buy_and_hold_final"] >= 2000.0
+
+
+class CountingMarketService(FakeMarketService):
+    def __init__(self):
+        self.calls = 0
+
+    def get_price_history_range(self, *args, **kwargs):
+        self.calls += 1
+        return super().get_price_history_range(*args, **kwargs)
+
+
+def test_sweep_matches_individual_backtests_and_fetches_once():
+    start = date(2020, 1, 1)
+    end = start + timedelta(days=249)
+    market = CountingMarketService()
+    service = BacktestService(market, FakeMacroService(), FakeEventService())
+
+    sweep = service.run_sweep(
+        start,
+        end,
+        initial_cash=1000.0,
+        buy_thresholds=[30.0, 40.0],
+        sell_thresholds=[60.0, 80.0],
+        score_mas=[20, 200],
+    )
+
+    assert market.calls == 1
+    assert len(sweep["results"]) == 8
+    assert [row["rank"] for row in sweep["results"]] == list(range(1, 9))
+    cagrs = [row["cagr_pct"] for row in sweep["results"]]
+    assert cagrs == sorted(cagrs, reverse=True)
+
+    for row in sweep["results"]:
+        single = service.run_backtest(
+            start,
+            end,
+            initial_cash=1000.0,
+            buy_threshold=row["buy_threshold"],
+            sell_threshold=row["sell_threshold"],
+            score_ma=row["score_ma"],
+        )
+        assert row["final_value"] == single["final_value"]
+        assert row["cagr_pct"] == single["cagr_pct"]
+        assert row["max_drawdown_pct"] == single["max_drawdown_pct"]
+        assert row["trade_count"] == single["trade_count"]
+        assert sweep["buy_and_hold_final"] == single["buy_and_hold_final"]
+
+
+def test_sweep_rejects_empty_grid():
+    service = BacktestService(FakeMarketService(), FakeMacroService(), FakeEventService())
+    with pytest.raises(ValueError):
+        service.run_sweep(date(2020, 1, 1), date(2020, 9, 6), 1000.0, [], [80.0])
+
+
+def test_process_pool_matches_serial_execution():
+    start = date(2020, 1, 1)
+    end = start + timedelta(days=249)
+    serial = BacktestService(FakeMarketService(), FakeMacroService(), FakeEventService())
+    pooled = BacktestService(FakeMarketService(), FakeMacroService(), FakeEventService())
+    pooled.max_workers = 2
+
+    sweep_args = (start, end, 1000.0, [30.0, 40.0], [60.0, 80.0], "SP500", [20, 60, 200])
+    assert pooled.run_sweep(*sweep_args) == serial.run_sweep(*sweep_args)
+
+    compare_args = (start, end, 1000.0, ["SP500", "TOPIX"])
+    assert pooled.run_multi_index(*compare_args) == serial.run_multi_index(*compare_args)
+
+    # プールはリクエスト間で使い回し、shutdown で停止する
+    pool = pooled._pool
+    assert pool is not None
+    pooled.run_multi_index(*compare_args)
+    assert pooled._pool is pool
+    pooled.shutdown()
+    assert pooled._pool is None
+    assert serial._pool is None
@@ -0,0 +1,122 @@
+from datetime import timedelta
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from services.cache import SingleFlightCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_concurrent_misses_share_one_build():
+    cache = SingleFlightCache(ttl=timedelta(seconds=60))
+    calls = []
+    release = threading.Event()
+
+    def builder():
+        calls.append(1)
+        release.wait(timeout=5)
+        return "snapshot"
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get("SP500", builder)))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert len(calls) == 1
+    assert results == ["snapshot"] * 8
+    assert cache.peek("SP500").version == 1
+
+
+def test_stale_entry_is_served_while_refreshing_in_background():
+    clock = FakeClock()
+    cache = SingleFlightCache(ttl=timedelta(seconds=60), stale_while_revalidate=True, clock=clock)
+    assert cache.get("SP500", lambda: "old") == "old"
+
+    clock.now = 61
+    release = threading.Event()
+    refreshed = threading.Event()
+
+    def slow_builder():
+        release.wait(timeout=5)
+        refreshed.set()
+        return "new"
+
+    assert cache.get("SP500", slow_builder) == "old"
+    # 再構築中の呼び出しも待たずに古い値を返し、ビルドを重複させない
+    assert cache.get("SP500", lambda: pytest.fail("duplicate refresh")) == "old"
+
+    release.set()
+    assert refreshed.wait(timeout=5)
+    for _ in range(100):
+        if cache.peek("SP500").value == "new":
+            break
+        time.sleep(0.01)
+    assert cache.get("SP500", lambda: "unused") == "new"
+    assert cache.peek("SP500").version == 2
+
+
+def test_failed_build_is_not_cached():
+    cache = SingleFlightCache(ttl=timedelta(seconds=60))
+
+    def failing():
+        raise RuntimeError("yfinance down")
+
+    with pytest.raises(RuntimeError):
+        cache.get("SP500", failing)
+    assert cache.peek("SP500") is None
+    assert cache.get("SP500", lambda: "ok") == "ok"
+
+
+def test_get_entry_exposes_version_per_build():
+    clock = FakeClock()
+    cache = SingleFlightCache(ttl=timedelta(seconds=60), clock=clock)
+
+    first = cache.get_entry("SP500", lambda: "v1")
+    assert (first.value, first.version) == ("v1", 1)
+    assert cache.get_entry("SP500", lambda: "unused") is first
+
+    clock.now = 61
+    second = cache.get_entry("SP500", lambda: "v2")
+    assert (second.value, second.version) == ("v2", 2)
+    assert cache.refresh("SP500", lambda: "v3") == "v3"
+    assert cache.peek("SP500").version == 3
+
+
+def test_get_entry_nowait_never_builds_in_the_caller():
+    clock = FakeClock()
+    cache = SingleFlightCache(ttl=timedelta(seconds=60), stale_while_revalidate=True, clock=clock)
+    rebuilt = threading.Event()
+
+    def builder():
+        rebuilt.set()
+        return "new"
+
+    assert cache.get_entry_nowait("SP500", builder) is None
+    assert not rebuilt.is_set()
+
+    cache.put("SP500", "old")
+    assert cache.get_entry_nowait("SP500", builder).value == "old"
+    assert not rebuilt.is_set()
+
+    clock.now = 61
+    assert cache.get_entry_nowait("SP500", builder).value == "old"
+    assert rebuilt.wait(timeout=5)
@@ -0,0 +1,162 @@
+import asyncio
+import time
+from datetime import date
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import main
+from services.cache import CacheEntry
+
+
+def test_evaluate_price_series_window():
+    dates = np.array(["2024-01-02", "2024-01-03"], dtype="datetime64[D]")
+    snapshot = {"price_columns": {"date": dates}, "price_series": ["first", "second"]}
+
+    assert main._price_series_window(snapshot, None, None) == ["first", "second"]
+    assert main._price_series_window(snapshot, date(2024, 1, 3), None) == ["second"]
+    assert main._price_series_window(snapshot, None, date(2024, 1, 2)) == ["first"]
+    assert main._price_series_window(snapshot, date(2024, 1, 3), date(2024, 1, 2)) == []
+
+
+def test_technical_score_is_memoized_per_price_version(monkeypatch):
+    calls = []
+
+    def fake_score(price_history, base_window=200):
+        calls.append((price_history, base_window))
+        return float(base_window), {"base_window": base_window}
+
+    monkeypatch.setattr(main, "calculate_technical_score", fake_score)
+    monkeypatch.setattr(main, "_technical_memo", main.SingleFlightCache(ttl=main.timedelta(hours=1)))
+    first = CacheEntry("v1", built_at=0.0, version=1)
+    rebuilt = CacheEntry("v2", built_at=60.0, version=2)
+
+    assert main._technical_score_for(main.IndexType.SP500, 60, first)[0] == 60.0
+    assert main._technical_score_for(main.IndexType.SP500, 60, first)[0] == 60.0
+    main._technical_score_for(main.IndexType.SP500, 200, first)
+    main._technical_score_for(main.IndexType.TOPIX, 60, first)
+    main._technical_score_for(main.IndexType.SP500, 60, rebuilt)
+
+    assert calls == [("v1", 60), ("v1", 200), ("v1", 60), ("v2", 60)]
+
+
+def test_evaluate_batch_groups_by_index_and_score_ma(monkeypatch, fresh_components):
+    built = []
+    score_calls = []
+    closes = {main.IndexType.SP500: 1.0, main.IndexType.TOPIX: 2000.0}
+
+    def fake_prices(index_type):
+        built.append(index_type.value)
+        return [("2024-01-02", closes[index_type])]
+
+    def fake_score(price_history, base_window=200):
+        score_calls.append((price_history[-1][1], base_window))
+        return 40.0, {}
+
+    monkeypatch.setattr(main, "_build_prices", fake_prices)
+    monkeypatch.setattr(main, "_build_nav", lambda: built.append("nav") or 100.0)
+    monkeypatch.setattr(main, "_build_macro", lambda: built.append("macro") or {"score": 50.0, "details": {}})
+    monkeypatch.setattr(
+        main, "_build_events", lambda today: built.append("events") or {"adjustment": 0.0, "details": {}}
+    )
+    monkeypatch.setattr(main, "_build_chart", lambda price_history: built.append("chart"))
+    monkeypatch.setattr(main, "calculate_technical_score", fake_score)
+
+    payload = main.BatchEvaluateRequest(
+        positions=[
+            main.PositionRequest(total_quantity=10, avg_cost=90, index_type="SP500"),
+            main.PositionRequest(total_quantity=5, avg_cost=110, index_type="SP500"),
+            main.PositionRequest(total_quantity=1, avg_cost=1500, index_type="TOPIX", score_ma=60),
+        ]
+    )
+    result = asyncio.run(main.evaluate_batch(payload))
+
+    # 各部品は1回だけ構築され、チャート系列は作られない
+    assert sorted(built) == ["SP500", "TOPIX", "events", "macro", "nav"]
+    assert score_calls == [(1.0, 200), (2000.0, 60)]
+    assert [p["unrealized_pnl"] for p in result["positions"]] == [100.0, -50.0, 500.0]
+    assert result["positions"][2]["score_ma"] == 60
+    assert result["total"] == {
+        "currency": "JPY",
+        "market_value": 3500.0,
+        "cost_basis": 2950.0,
+        "unrealized_pnl": 550.0,
+    }
+    assert result["totals"] == [result["total"]]
+    main.BatchEvaluateResponse(**result)
+
+
+def test_evaluate_batch_totals_add_up_after_rounding(monkeypatch, fresh_components):
+    monkeypatch.setattr(main, "_build_prices", lambda index_type: [("2024-01-02", 100.0)])
+    monkeypatch.setattr(main, "_build_nav", lambda: 100.0)
+    monkeypatch.setattr(main, "_build_macro", lambda: {"score": 50.0, "details": {}})
+    monkeypatch.setattr(main, "_build_events", lambda today: {"adjustment": 0.0, "details": {}})
+    monkeypatch.setattr(main, "calculate_technical_score", lambda history, base_window=200: (40.0, {}))
+
+    payload = main.BatchEvaluateRequest(
+        positions=[main.PositionRequest(total_quantity=1, avg_cost=0.004, index_type="SP500")] * 3
+    )
+    result = asyncio.run(main.evaluate_batch(payload))
+
+    total = result["total"]
+    assert total["unrealized_pnl"] == round(total["market_value"] - total["cost_basis"], 2)
+    assert total["unrealized_pnl"] == round(sum(p["unrealized_pnl"] for p in result["positions"]), 2)
+
+
+def test_cold_components_are_built_concurrently(monkeypatch, fresh_components):
+    delay = 0.3
+
+    def slow(value):
+        def build(*args):
+            time.sleep(delay)
+            return value
+
+        return build
+
+    monkeypatch.setattr(main, "_build_prices", slow([("2024-01-02", 100.0)]))
+    monkeypatch.setattr(main, "_build_nav", slow(100.0))
+    monkeypatch.setattr(main, "_build_macro", slow({"score": 50.0, "details": {}}))
+    monkeypatch.setattr(main, "_build_events", slow({"adjustment": 0.0, "details": {}}))
+    monkeypatch.setattr(main, "_build_chart", lambda price_history: {})
+    monkeypatch.setattr(main, "calculate_technical_score", lambda history, base_window=200: (40.0, {}))
+
+    position = main.PositionRequest(total_quantity=1, avg_cost=90, index_type="SP500")
+    started = time.monotonic()
+    result = asyncio.run(main._evaluate(position, include_series=False))
+    # 価格・基準価額・マクロ・イベントを順に待つと 4 倍かかる
+    assert time.monotonic() - started < delay * 2
+    assert result["current_price"] == 100.0
+
+    monkeypatch.setattr(main, "_build_prices", slow([("2024-01-03", 101.0)]))
+    for name in ("_nav_cache", "_macro_cache", "_events_cache"):
+        monkeypatch.setattr(main, name, main.SingleFlightCache(ttl=main.timedelta(minutes=1)))
+    started = time.monotonic()
+    main._refresh_snapshot("SP500")
+    assert time.monotonic() - started < delay * 2
+
+
+def test_evaluate_batch_does_not_sum_across_currencies(monkeypatch, fresh_components):
+    monkeypatch.setattr(main, "_build_prices", lambda index_type: [("2024-01-02", 100.0)])
+    monkeypatch.setattr(main, "_build_nav", lambda: 30000.0)
+    monkeypatch.setattr(main, "_build_macro", lambda: {"score": 50.0, "details": {}})
+    monkeypatch.setattr(main, "_build_events", lambda today: {"adjustment": 0.0, "details": {}})
+    monkeypatch.setattr(main, "calculate_technical_score", lambda history, base_window=200: (40.0, {}))
+
+    payload = main.BatchEvaluateRequest(
+        positions=[
+            main.PositionRequest(total_quantity=1, avg_cost=25000, index_type="SP500"),
+            main.PositionRequest(total_quantity=2, avg_cost=90, index_type="ORUKAN"),
+        ]
+    )
+    result = asyncio.run(main.evaluate_batch(payload))
+
+    assert [p["currency"] for p in result["positions"]] == ["JPY", "USD"]
+    assert result["total"] is None
+    assert result["totals"] == [
+        {"currency": "JPY", "market_value": 30000.0, "cost_basis": 25000.0, "unrealized_pnl": 5000.0},
+        {"currency": "USD", "market_value": 200.0, "cost_basis": 180.0, "unrealized_pnl": 20.0},
+    ]
+    main.BatchEvaluateResponse(**result)
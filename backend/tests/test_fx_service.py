@@ -0,0 +1,87 @@
+from datetime import date, timedelta
+import os
+import sys
+
+import pandas as pd
+import yfinance as yf
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from services.fx_service import FxRateProvider
+from services.nav_service import FundNavService
+from services.sp500_market_service import SP500MarketService
+
+
+def _closes(start: date, values):
+    index = pd.date_range(start, periods=len(values), freq="D")
+    return pd.DataFrame({"Close": values}, index=index)
+
+
+def test_latest_rate_is_shared_between_services(monkeypatch):
+    calls = []
+
+    def fake_download(symbol, **kwargs):
+        calls.append((symbol, kwargs))
+        return _closes(date(2024, 1, 1), [149.0, 150.5])
+
+    monkeypatch.setattr(yf, "download", fake_download)
+    fx = FxRateProvider()
+    market = SP500MarketService(symbol="TEST", fx_provider=fx)
+    nav = FundNavService(fx_provider=fx)
+
+    assert market.get_usd_jpy() == 150.5
+    assert nav.fetch_usdjpy_rate() == (150.5, "2024-01-02")
+    assert len(calls) == 1
+
+
+def test_history_serves_covered_ranges_from_cache(monkeypatch):
+    calls = []
+    start = date(2024, 1, 1)
+
+    def fake_download(symbol, start, end, interval):
+        calls.append((symbol, start, end))
+        return _closes(start, [150.0 + i for i in range((end - start).days)])
+
+    monkeypatch.setattr(yf, "download", fake_download)
+    fx = FxRateProvider()
+
+    full = fx.history("JPY=X", start, start + timedelta(days=9))
+    assert len(full) == 10
+    window = fx.history("JPY=X", start + timedelta(days=2), start + timedelta(days=4))
+    assert window.tolist() == [152.0, 153.0, 154.0]
+    assert len(calls) == 1
+
+    # 一括取得した系列を登録すると、その範囲は再取得しない
+    fx.put_history("EUR=X", start, start + timedelta(days=1), _closes(start, [0.9, 0.91])["Close"])
+    assert fx.history("EUR=X", start, start + timedelta(days=1)).tolist() == [0.9, 0.91]
+    assert len(calls) == 1
+
+
+def test_live_rate_prefers_intraday_and_labels_the_close_fallback(monkeypatch):
+    fx_intraday = {"lastPrice": 151.234}
+
+    class FakeTicker:
+        def __init__(self, symbol):
+            self.fast_info = fx_intraday if symbol == "JPY=X" else {"lastPrice": 5000.0}
+
+    monkeypatch.setattr(yf, "Ticker", FakeTicker)
+    monkeypatch.setattr(yf, "download", lambda symbol, **kwargs: _closes(date(2024, 1, 1), [149.0, 150.5]))
+    fx = FxRateProvider()
+    market = SP500MarketService(symbol="TEST", fx_provider=fx)
+
+    rate, _, source = fx.live("JPY=X")
+    assert (rate, source) == (151.234, "live")
+    quote = market.get_quote("sp500_jpy")
+    assert quote["price"] == round(5000.0 * 151.234, 2)
+    assert quote["source"] == "live"
+
+    # 日中の為替が取れないときは終値レートを使い、現在値も終値扱いにする
+    fx_intraday.clear()
+    fx = FxRateProvider()
+    market = SP500MarketService(symbol="TEST", fx_provider=fx)
+    assert fx.live("JPY=X") == (150.5, "2024-01-02", "close")
+    assert market.get_quote("sp500_jpy") == {
+        "price": round(5000.0 * 150.5, 2),
+        "source": "close",
+        "as_of": "2024-01-02",
+    }
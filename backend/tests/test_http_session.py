@@ -0,0 +1,57 @@
+import gzip
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from services.http_session import build_session, shared_session
+
+
+def _serve(responses, seen):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            seen.append((self.client_address[1], self.headers.get("Accept-Encoding")))
+            status, payload = responses.pop(0)
+            body = gzip.compress(json.dumps(payload).encode())
+            self.send_response(status)
+            self.send_header("Content-Encoding", "gzip")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def test_session_retries_transient_errors_and_reuses_the_connection():
+    seen = []
+    server = _serve([(503, {}), (200, {"observations": [1]}), (200, {"observations": [2]})], seen)
+    url = f"http://127.0.0.1:{server.server_address[1]}/series"
+    session = build_session(retries=2, backoff_factor=0)
+    try:
+        first = session.get(url, timeout=(1, 5))
+        second = session.get(url, timeout=(1, 5))
+    finally:
+        session.close()
+        server.shutdown()
+
+    assert first.status_code == 200 and first.json() == {"observations": [1]}
+    assert second.json() == {"observations": [2]}
+    assert len(seen) == 3
+    assert all("gzip" in encoding for _, encoding in seen)
+    # keep-alive: the retry and the next request ride on the same socket
+    assert len({port for port, _ in seen}) == 1
+
+
+def test_shared_session_is_one_per_upstream():
+    assert shared_session("fred") is shared_session("fred")
+    assert shared_session("fred") is not shared_session("nav")
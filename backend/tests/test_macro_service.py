@@ -0,0 +1,115 @@
+import time
+from datetime import date, timedelta
+
+from backend.services.macro_data_service import MacroDataService
+
+
+def test_get_macro_series_fetches_concurrently_and_times_out_to_synthetic(monkeypatch):
+    service = MacroDataService()
+    service.fetch_timeout = 0.5
+
+    def slow(value, delay):
+        def fetch():
+            time.sleep(delay)
+            return value
+
+        return fetch
+
+    monkeypatch.setattr(service, "_fetch_r10y", slow(([1.0, 2.0], 3.0), 0.3))
+    monkeypatch.setattr(service, "_fetch_cpi", slow(([2.0, 3.0], 4.0), 0.3))
+    monkeypatch.setattr(service, "_fetch_vix", slow(([10.0], 20.0), 2.0))
+
+    started = time.monotonic()
+    series = service.get_macro_series()
+    elapsed = time.monotonic() - started
+
+    assert series["r_10y"] == ([1.0, 2.0], 3.0)
+    assert series["cpi"] == ([2.0, 3.0], 4.0)
+    assert series["vix"] == service._synthetic_series(18.0, 5.0, seed_tag="vix")
+    # 逐次なら 2.6 秒以上かかる
+    assert elapsed < 1.5
+
+
+def test_hung_sources_share_one_deadline(monkeypatch):
+    service = MacroDataService()
+    service.fetch_timeout = 0.3
+
+    def hung():
+        time.sleep(1.0)
+        return [0.0], 0.0
+
+    for name in ("_fetch_r10y", "_fetch_cpi", "_fetch_vix"):
+        monkeypatch.setattr(service, name, hung)
+
+    started = time.monotonic()
+    series = service.get_macro_series()
+    elapsed = time.monotonic() - started
+
+    assert series["cpi"] == service._synthetic_latest("cpi")
+    # 系列ごとに待つと 0.9 秒以上かかる
+    assert elapsed < 0.6
+
+
+def test_get_macro_series_is_cached_across_calls(monkeypatch):
+    service = MacroDataService()
+    calls = []
+
+    def fetch_r10y():
+        calls.append("r_10y")
+        return [1.0, 2.0], 3.0
+
+    monkeypatch.setattr(service, "_fetch_r10y", fetch_r10y)
+    monkeypatch.setattr(service, "_fetch_cpi", lambda: ([2.0], 3.0))
+    monkeypatch.setattr(service, "_fetch_vix", lambda: ([10.0], 20.0))
+
+    for _ in range(7):
+        assert service.get_macro_series()["r_10y"] == ([1.0, 2.0], 3.0)
+    assert calls == ["r_10y"]
+
+
+def test_range_requests_are_served_from_cached_superset(monkeypatch):
+    service = MacroDataService()
+    requested = []
+
+    def fake_live(start, end):
+        requested.append((start, end))
+        days = (end - start).days
+        return [(start + timedelta(days=i), float(i)) for i in range(days + 1)]
+
+    monkeypatch.setattr(service, "_fetch_r10y_range_live", fake_live)
+    monkeypatch.setattr(service, "_fetch_cpi_range_live", fake_live)
+    monkeypatch.setattr(service, "_fetch_vix_range_live", lambda start, end: [])
+
+    wide = service.get_macro_series_range(date(2020, 1, 1), date(2020, 12, 31))
+    narrow = service.get_macro_series_range(date(2020, 3, 1), date(2020, 3, 31))
+
+    assert len(requested) == 2  # r_10y と cpi を1回ずつ
+    assert narrow["r_10y"] == [(d, v) for d, v in wide["r_10y"] if date(2020, 3, 1) <= d <= date(2020, 3, 31)]
+    # 実データが無い系列は期間ごとの疑似系列（切り出しはしない）
+    assert narrow["vix"] == service._synthetic_range("vix", date(2020, 3, 1), date(2020, 3, 31))
+
+
+def test_failed_latest_fetch_falls_back_without_caching(monkeypatch):
+    service = MacroDataService()
+    responses = [ValueError("FRED unavailable"), ([1.0, 2.0], 3.0)]
+
+    def flaky_r10y():
+        response = responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    monkeypatch.setattr(service, "_fetch_r10y", flaky_r10y)
+    monkeypatch.setattr(service, "_fetch_cpi", lambda: ([2.0], 3.0))
+    monkeypatch.setattr(service, "_fetch_vix", lambda: ([10.0], 20.0))
+
+    assert service.get_macro_series()["r_10y"] == service._synthetic_latest("r_10y")
+    # 疑似系列はキャッシュされず、次の呼び出しで実データを取りに行く
+    assert service.get_macro_series()["r_10y"] == ([1.0, 2.0], 3.0)
+
+
+def test_shutdown_stops_the_fetch_pool():
+    service = MacroDataService()
+    service.shutdown()
+
+    assert service._executor._shutdown
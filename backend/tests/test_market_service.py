@@ -1,6 +1,13 @@
+import os
+import sys
+from datetime import date, timedelta
+
 import pandas as pd
 import yfinance as yf
 
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from backend.services.price_store import PriceHistoryStore
 from backend.services.sp500_market_service import SP500MarketService
 
 
@@ -21,3 +28,163 @@ def test_get_price_history_range_handles_dataframe(monkeypatch):
         (dates[1].date().isoformat(), 101.5),
         (dates[2].date().isoformat(), 102.25),
     ]
+
+
+def test_price_history_store_fetches_only_trailing_days(monkeypatch, tmp_path):
+    store = PriceHistoryStore(str(tmp_path))
+    service = SP500MarketService(symbol="TEST", price_store=store)
+
+    all_dates = pd.date_range(date.today() - timedelta(days=365 * 5), date.today(), freq="B")
+    all_closes = pd.Series([100.0 + i * 0.01 for i in range(len(all_dates))], index=all_dates)
+    requested = []
+
+    def fake_download(symbol, start, end, interval):  # pragma: no cover - simple stub
+        requested.append(start)
+        closes = all_closes[(all_closes.index.date >= start) & (all_closes.index.date < end)]
+        return pd.DataFrame({"Close": closes})
+
+    monkeypatch.setattr(yf, "download", fake_download)
+
+    first = service.get_price_history("SP500")
+    service._history_cache.invalidate("SP500")
+    second = service.get_price_history("SP500")
+
+    assert first == second
+    assert len(first) == len(all_dates)
+    assert requested[0] == date.today() - timedelta(days=365 * 5)
+    # 2回目は保存済みの末尾付近だけを取得する
+    assert requested[1] >= date.today() - timedelta(days=SP500MarketService.STORE_REFRESH_OVERLAP_DAYS + 3)
+
+    # 新しいプロセス相当（同じディレクトリ）でもディスクから復元できる
+    cold = SP500MarketService(symbol="TEST", price_store=PriceHistoryStore(str(tmp_path)))
+    assert cold.get_price_history("SP500") == first
+
+
+def test_warm_price_histories_downloads_all_symbols_once(monkeypatch):
+    service = SP500MarketService(symbol="^GSPC")
+    service.price_store = None
+    service.nav_api_map = {}
+    service.symbol_map.update({"TOPIX": "1306.T", "orukan_jpy": "ACWI", "sp500_jpy": "^GSPC"})
+    service.fx_symbol_map.update({"orukan_jpy": "JPY=X", "sp500_jpy": "JPY=X"})
+
+    dates = pd.date_range(date.today() - timedelta(days=6), periods=5, freq="D")
+    columns = pd.MultiIndex.from_product([["Close"], ["^GSPC", "1306.T", "ACWI", "JPY=X"]])
+    frame = pd.DataFrame(
+        [
+            [100.0, 2000.0, 50.0, 150.0],
+            [101.0, None, 51.0, 151.0],  # 東証休場日
+            [102.0, 2010.0, 52.0, 152.0],
+            [103.0, 2020.0, 53.0, None],  # 為替欠損
+            [104.0, 2030.0, 54.0, 154.0],
+        ],
+        index=dates,
+        columns=columns,
+    )
+    calls = []
+
+    def fake_download(symbols, start, end, interval, group_by):  # pragma: no cover - simple stub
+        calls.append(list(symbols))
+        return frame
+
+    monkeypatch.setattr(yf, "download", fake_download)
+
+    warmed = service.warm_price_histories(["SP500", "TOPIX", "orukan_jpy", "sp500_jpy"])
+
+    assert calls == [["^GSPC", "1306.T", "ACWI", "JPY=X"]]
+    iso = [d.date().isoformat() for d in dates]
+    assert warmed["SP500"] == [(d, v) for d, v in zip(iso, [100.0, 101.0, 102.0, 103.0, 104.0])]
+    assert [d for d, _ in warmed["TOPIX"]] == [iso[0], iso[2], iso[3], iso[4]]
+    assert warmed["orukan_jpy"] == [(iso[0], 7500.0), (iso[1], 7701.0), (iso[2], 7904.0), (iso[4], 8316.0)]
+    assert warmed["sp500_jpy"][0] == (iso[0], 15000.0)
+
+    # 温めた履歴は追加のダウンロードなしで返る
+    assert service.get_price_history("TOPIX") == warmed["TOPIX"]
+    assert len(calls) == 1
+
+    # 一括取得した為替系列は個別取得の経路とも共有される
+    fx_close = service.fx.history("JPY=X", dates[0].date(), date.today())
+    assert fx_close.tolist() == [150.0, 151.0, 152.0, 154.0]
+    assert len(calls) == 1
+
+
+def test_quote_is_cached_separately_and_falls_back_to_last_close(monkeypatch):
+    service = SP500MarketService(symbol="TEST")
+    tickers = []
+
+    class FakeTicker:
+        def __init__(self, symbol):
+            tickers.append(symbol)
+            self.fast_info = {"lastPrice": 123.456}
+
+    monkeypatch.setattr(yf, "Ticker", FakeTicker)
+
+    quote = service.get_quote("SP500")
+    assert quote["price"] == 123.46
+    assert quote["source"] == "live"
+    assert service.get_quote("SP500")["as_of"] == quote["as_of"]
+    assert service.get_current_price(None, "SP500") == 123.46
+    assert tickers == ["TEST"]
+
+    class BrokenTicker:
+        def __init__(self, symbol):
+            tickers.append(symbol)
+            raise RuntimeError("offline")
+
+    monkeypatch.setattr(yf, "Ticker", BrokenTicker)
+    service._history_cache.put("TOPIX", [("2024-01-05", 2500.0)])
+    assert service.get_quote("TOPIX") == {"price": 2500.0, "source": "close", "as_of": "2024-01-05"}
+    # オフライン中のフォールバックも TTL 内はキャッシュされ、毎回 yfinance を叩かない
+    assert service.get_quote("TOPIX")["source"] == "close"
+    assert len(tickers) == 2
+
+
+def test_quote_without_intraday_price_reports_the_daily_close(monkeypatch):
+    service = SP500MarketService(symbol="TEST")
+
+    class NoIntradayTicker:
+        fast_info = {}
+
+        def __init__(self, symbol):
+            pass
+
+        def history(self, period, interval):
+            return pd.DataFrame({"Close": [99.0, 101.0]}, index=pd.to_datetime(["2024-01-04", "2024-01-05"]))
+
+    monkeypatch.setattr(yf, "Ticker", NoIntradayTicker)
+
+    assert service.get_quote("SP500") == {"price": 101.0, "source": "close", "as_of": "2024-01-05"}
+    assert service.get_current_price([("2024-01-03", 98.0)], "SP500") == 98.0
+
+
+def test_nav_history_dates_are_normalized(monkeypatch):
+    service = SP500MarketService(symbol="TEST")
+    service.nav_api_map["SP500"] = "https://nav.example"
+
+    class FakeResponse:
+        def raise_for_status(self):
+            pass
+
+        def json(self):
+            return [
+                {"date": "2024/01/05", "close": 100.0},
+                {"date": "2024-01-09T00:00:00+09:00", "close": 101.0},
+            ]
+
+    monkeypatch.setattr(service.http, "get", lambda *args, **kwargs: FakeResponse())
+
+    assert service._fetch_nav_history(date(2024, 1, 1), date(2024, 1, 31), "SP500") == [
+        ("2024-01-05", 100.0),
+        ("2024-01-09", 101.0),
+    ]
+
+
+def test_unparseable_history_falls_back_like_a_failed_fetch(monkeypatch):
+    service = SP500MarketService(symbol="TEST")
+    service.allow_synth_map["SP500"] = True
+    monkeypatch.setattr(
+        service, "_fetch_history_with_store", lambda start, end, index_type: [("05.01.2024", 100.0)]
+    )
+
+    history = service.get_price_history("SP500")
+    start, today = service._history_window()
+    assert history == service._fallback_history(start, today, "SP500")
@@ -0,0 +1,57 @@
+from datetime import datetime, timedelta
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from services.nav_service import JST, FundNavService
+
+
+def _service(now):
+    service = FundNavService(fund_symbol="TEST", now=lambda: now)
+    service.publish_time = service.publish_time.replace(hour=20)
+    service.retry_after = timedelta(minutes=15)
+    return service
+
+
+def test_publication_schedule_skips_weekends():
+    friday_night = datetime(2024, 1, 12, 21, 0, tzinfo=JST)
+    service = _service(friday_night)
+
+    assert service.last_publication(friday_night) == datetime(2024, 1, 12, 20, 0, tzinfo=JST)
+    assert service.next_publication(friday_night) == datetime(2024, 1, 15, 20, 0, tzinfo=JST)
+
+    saturday = datetime(2024, 1, 13, 9, 0, tzinfo=JST)
+    assert service.last_publication(saturday) == datetime(2024, 1, 12, 20, 0, tzinfo=JST)
+
+    monday_morning = datetime(2024, 1, 15, 9, 0, tzinfo=JST)
+    assert service.last_publication(monday_morning) == datetime(2024, 1, 12, 20, 0, tzinfo=JST)
+    assert service.next_publication(monday_morning) == datetime(2024, 1, 15, 20, 0, tzinfo=JST)
+
+
+def test_official_nav_is_held_until_next_publication():
+    now = datetime(2024, 1, 10, 21, 0, tzinfo=JST)
+    service = _service(now)
+
+    assert service._official_nav_ttl({"asOf": "2024-01-10"}) == timedelta(hours=23)
+    # 最新分がまだ公表されていない / 取得失敗は短い間隔で再確認する
+    assert service._official_nav_ttl({"asOf": "2024-01-09"}) == timedelta(minutes=15)
+    assert service._official_nav_ttl(None) == timedelta(minutes=15)
+    just_before = _service(datetime(2024, 1, 11, 19, 55, tzinfo=JST))
+    assert just_before._official_nav_ttl({"asOf": "2024-01-10"}) == timedelta(minutes=5)
+
+
+def test_official_nav_is_fetched_once_per_publication(monkeypatch):
+    service = _service(datetime(2024, 1, 10, 21, 0, tzinfo=JST))
+    calls = []
+
+    def fake_fetch():
+        calls.append(1)
+        return 30000.0, "2024-01-10"
+
+    monkeypatch.setattr(service, "fetch_fund_nav_jpy", fake_fetch)
+
+    expected = {"asOf": "2024-01-10", "navJpy": 30000.0, "source": "fund"}
+    assert service.get_official_nav() == expected
+    assert service.get_official_nav() == expected
+    assert len(calls) == 1
@@ -0,0 +1,26 @@
+import asyncio
+import os
+import sys
+import threading
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from services.offload import BlockingPool
+
+
+def test_blocking_calls_do_not_stall_the_event_loop():
+    pool = BlockingPool("test-io", max_workers=1)
+    release = threading.Event()
+
+    async def scenario():
+        slow = asyncio.ensure_future(pool.run(release.wait, timeout=5))
+        # イベントループ上の処理は、プールが埋まっていても即座に進む
+        await asyncio.sleep(0)
+        assert not slow.done()
+        release.set()
+        return await slow
+
+    try:
+        assert asyncio.run(scenario()) is True
+    finally:
+        pool.shutdown()
@@ -0,0 +1,62 @@
+import os
+import sys
+from datetime import date
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from domain.price_series import PriceSeries, as_price_series
+from services.sp500_market_service import SP500MarketService
+
+
+HISTORY = [("2024-01-02", 100.0), ("2024-01-03", 101.5), ("2024-01-04", 99.25)]
+
+
+def test_price_series_behaves_like_tuple_history():
+    series = as_price_series(HISTORY)
+
+    assert len(series) == 3
+    assert series == HISTORY
+    assert series[0] == ("2024-01-02", 100.0)
+    assert series[-1][1] == 99.25
+    assert list(series) == HISTORY
+    assert series.to_tuples() == HISTORY
+    assert series.date_values() == [date(2024, 1, 2), date(2024, 1, 3), date(2024, 1, 4)]
+    assert as_price_series(series) is series
+
+
+def test_price_series_slices_are_views():
+    series = as_price_series(HISTORY)
+    tail = series[1:]
+
+    assert isinstance(tail, PriceSeries)
+    assert tail == HISTORY[1:]
+    assert np.shares_memory(tail.closes, series.closes)
+
+
+def test_moving_average_is_computed_once_and_shared_with_scoring():
+    history = [(f"2024-01-{day:02d}", 100.0 + day) for day in range(1, 31)]
+    series = as_price_series(history)
+
+    ma20 = series.moving_average(20)
+    assert series.moving_average(20) is ma20
+    assert not ma20.flags.writeable
+    assert np.isnan(ma20[18])
+    assert ma20[19] == sum(c for _, c in history[:20]) / 20
+
+    # 任意の window は計算するだけで保持しない
+    ma5 = series.moving_average(5)
+    assert ma5[4] == sum(c for _, c in history[:5]) / 5
+    assert series.moving_average(5) is not ma5
+    assert 5 not in series._ma_cache
+
+    rows = SP500MarketService(symbol="TEST").build_price_series_with_ma(series)
+    assert rows[19] == {
+        "date": "2024-01-20",
+        "close": 120.0,
+        "ma20": round(float(series.moving_average(20)[19]), 2),
+        "ma60": None,
+        "ma200": None,
+    }
+    assert rows[18]["ma20"] is None
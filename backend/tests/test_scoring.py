@@ -1,11 +1,19 @@
 from datetime import date, timedelta
+import math
 import os
+import random
 import sys
 
+import pytest
+
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from scoring.technical import calculate_technical_score
-from scoring.macro import calculate_macro_score
+from scoring.technical import (
+    TechnicalScoreEngine,
+    calculate_technical_score,
+    calculate_technical_score_series,
+)
+from scoring.macro import MacroPercentileEngine, calculate_macro_score
 from scoring.events import calculate_event_adjustment
 from scoring.total_score import get_label
 
@@ -59,3 +67,83 @@ def test_label_boundaries():
     assert get_label(65) == "利確を検討"
     assert get_label(50) == "ホールド"
     assert get_label(20) == "買い増し・追加投資検討"
+
+
+def build_random_history(days: int, seed: int = 7):
+    rng = random.Random(seed)
+    history = []
+    price = 100.0
+    base_date = date(2020, 1, 1)
+    for i in range(days):
+        price = round(price * (1 + rng.uniform(-0.03, 0.03)), 2)
+        history.append(((base_date + timedelta(days=i)).isoformat(), price))
+    return history
+
+
+def test_technical_engine_matches_scalar_score():
+    history = build_random_history(320)
+    for base_window in (20, 60, 200, 250):
+        engine = TechnicalScoreEngine(base_window=base_window)
+        for idx, (_, close) in enumerate(history):
+            engine.push(close)
+            if idx + 1 < max(200, base_window):
+                assert not engine.ready
+                continue
+            expected = calculate_technical_score(history[: idx + 1], base_window=base_window)
+            assert engine.score() == expected
+
+
+def test_technical_score_series_matches_scalar_score():
+    history = build_random_history(320, seed=11)
+    # 下落トレンド（T_trend=-10）と横ばい（MA が同値）の区間も含める
+    price = history[-1][1]
+    for i in range(80):
+        price = round(price * 0.99, 2)
+        history.append(((date(2021, 1, 1) + timedelta(days=i)).isoformat(), price))
+    history += [((date(2021, 4, 1) + timedelta(days=i)).isoformat(), 4000.12) for i in range(220)]
+    closes = [close for _, close in history]
+    for base_window in (20, 60, 200, 250):
+        series = calculate_technical_score_series(closes, base_window=base_window)
+        for idx in range(len(closes)):
+            if idx + 1 < max(200, base_window):
+                assert math.isnan(series["score"][idx])
+                continue
+            score, details = calculate_technical_score(history[: idx + 1], base_window=base_window)
+            assert series["score"][idx] == score
+            assert series["d"][idx] == details["d"]
+            assert series["T_base"][idx] == details["T_base"]
+            assert series["T_trend"][idx] == details["T_trend"]
+            assert series["ma_base"][idx] == details["ma_base"]
+
+
+def test_macro_percentile_engine_matches_percentile_rank():
+    rng = random.Random(3)
+    start = date(2020, 1, 1)
+    macro_series = {
+        # CPI のような月次系列・重複値ありの系列・日次系列を混ぜる
+        "r_10y": [(start + timedelta(days=i), round(rng.uniform(1, 5), 1)) for i in range(0, 400, 1)],
+        "cpi": [(start + timedelta(days=i), round(rng.uniform(2, 6), 2)) for i in range(5, 400, 30)],
+        "vix": [(start + timedelta(days=i), float(rng.randint(10, 30))) for i in range(0, 400, 2)],
+    }
+
+    def slice_and_score(current: date):
+        parts = []
+        for name in ("r_10y", "cpi", "vix"):
+            values = [v for d, v in macro_series[name] if d <= current]
+            if len(values) == 1:
+                values.append(values[0])
+            parts.append((values[:-1], values[-1]))
+        return calculate_macro_score(*parts)
+
+    engine = MacroPercentileEngine(macro_series)
+    for i in range(5, 420):
+        current = start + timedelta(days=i)
+        assert engine.score_at(current) == slice_and_score(current)
+
+
+def test_macro_percentile_engine_requires_data():
+    engine = MacroPercentileEngine(
+        {"r_10y": [(date(2020, 1, 2), 1.0)], "cpi": [(date(2020, 1, 1), 1.0)], "vix": []}
+    )
+    with pytest.raises(ValueError):
+        engine.score_at(date(2020, 1, 5))
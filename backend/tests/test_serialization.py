@@ -0,0 +1,136 @@
+import asyncio
+import json
+import os
+import struct
+import sys
+from datetime import date
+
+import numpy as np
+from starlette.requests import Request
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import main
+from services import price_series_formats
+from services.serialization import SerializedBody
+
+
+ROWS = [
+    {"date": "2024-01-02", "close": 100.0, "ma20": None, "ma60": None, "ma200": None},
+    {"date": "2024-01-03", "close": 101.25, "ma20": 100.5, "ma60": None, "ma200": None},
+]
+
+
+def _get_sp500_history(request, series_format=None, since=None):
+    return asyncio.run(main.get_sp500_history(request, series_format=series_format, since=since))
+
+
+def _request(headers=None):
+    raw = [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": raw})
+
+
+def test_serialized_body_round_trips_and_matches_etags():
+    serialized = SerializedBody.json(ROWS)
+
+    assert json.loads(serialized.body) == ROWS
+    assert serialized.etag == SerializedBody.json(ROWS).etag
+    assert serialized.etag != SerializedBody.json(ROWS[:1]).etag
+    assert serialized.matches(serialized.etag)
+    assert serialized.matches(f'"other", W/{serialized.etag}')
+    assert serialized.matches("*")
+    assert not serialized.matches('"other"')
+    assert not serialized.matches(None)
+
+
+COLUMNS = {
+    "date": np.array(["2024-01-02", "2024-01-03"], dtype="datetime64[D]"),
+    "close": np.array([100.0, 101.25]),
+    "ma20": np.array([np.nan, 100.5]),
+    "ma60": np.array([np.nan, np.nan]),
+    "ma200": np.array([np.nan, np.nan]),
+}
+
+
+def _snapshot():
+    return {
+        "price_columns": COLUMNS,
+        "price_series_bodies": {
+            fmt: price_series_formats.encode(COLUMNS, fmt) for fmt in price_series_formats.FORMATS
+        },
+    }
+
+
+def test_price_series_formats_encode_the_same_columns():
+    assert price_series_formats.to_rows(COLUMNS) == ROWS
+    assert json.loads(price_series_formats.encode(COLUMNS, "rows").body) == ROWS
+    assert json.loads(price_series_formats.encode(COLUMNS, "columnar").body) == {
+        "date": ["2024-01-02", "2024-01-03"],
+        "close": [100.0, 101.25],
+        "ma20": [None, 100.5],
+        "ma60": [None, None],
+        "ma200": [None, None],
+    }
+
+    body = price_series_formats.encode(COLUMNS, "f32").body
+    (count,) = struct.unpack_from("<I", body)
+    days = np.frombuffer(body, dtype="<i4", count=count, offset=4)
+    values = np.frombuffer(body, dtype="<f4", offset=4 + 4 * count).reshape(4, count)
+    assert count == 2
+    assert days.astype("datetime64[D]").tolist() == [date(2024, 1, 2), date(2024, 1, 3)]
+    assert values[0].tolist() == [100.0, 101.25]
+    assert np.isnan(values[1][0]) and values[1][1] == 100.5
+
+
+def test_format_selection_and_since_delta():
+    assert price_series_formats.select_format(None, None) == "rows"
+    assert price_series_formats.select_format(None, "application/json") == "rows"
+    assert price_series_formats.select_format(
+        None, "application/vnd.price-series.f32;q=1, application/json;q=0.5"
+    ) == "f32"
+    assert price_series_formats.select_format("columnar", "application/vnd.price-series.f32") == "columnar"
+
+    delta = price_series_formats.slice_since(COLUMNS, date(2024, 1, 2))
+    assert price_series_formats.to_rows(delta) == ROWS[1:]
+    assert len(price_series_formats.slice_since(COLUMNS, date(2024, 1, 3))["date"]) == 0
+
+
+def test_price_history_response_serves_bytes_and_304(monkeypatch, fresh_components):
+    snapshot = _snapshot()
+    serialized = snapshot["price_series_bodies"]["rows"]
+    monkeypatch.setattr(main, "_build_prices", lambda index_type: [("2024-01-03", 101.25)])
+    monkeypatch.setattr(main, "_build_chart", lambda price_history: snapshot)
+
+    response = _get_sp500_history(_request())
+    assert response.status_code == 200
+    assert response.body == serialized.body
+    assert response.headers["etag"] == serialized.etag
+    assert "must-revalidate" in response.headers["cache-control"]
+
+    not_modified = _get_sp500_history(_request({"If-None-Match": serialized.etag}))
+    assert not_modified.status_code == 304
+    assert not_modified.body == b""
+    assert not_modified.headers["etag"] == serialized.etag
+
+    compact = _get_sp500_history(_request(), series_format=main.PriceSeriesFormat.COLUMNAR)
+    assert compact.headers["content-type"] == "application/vnd.price-series.columnar+json"
+    assert compact.body == snapshot["price_series_bodies"]["columnar"].body
+
+    delta = _get_sp500_history(_request(), since=date(2024, 1, 2))
+    assert json.loads(delta.body) == ROWS[1:]
+
+
+def test_price_history_response_skips_unrelated_components(monkeypatch, fresh_components):
+    built = []
+
+    def unexpected(*args):
+        raise AssertionError("price history must not build macro, events or NAV")
+
+    monkeypatch.setattr(main, "_build_prices", lambda index_type: built.append("prices") or [])
+    monkeypatch.setattr(main, "_build_chart", lambda price_history: built.append("chart") or _snapshot())
+    for name in ("_build_macro", "_build_events", "_build_nav"):
+        monkeypatch.setattr(main, name, unexpected)
+
+    assert _get_sp500_history(_request()).status_code == 200
+    assert _get_sp500_history(_request()).status_code == 200
+    assert built == ["prices", "chart"]
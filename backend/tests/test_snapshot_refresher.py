@@ -0,0 +1,121 @@
+from datetime import timedelta
+import os
+import random
+import sys
+import threading
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from services.snapshot_refresher import SnapshotRefresher
+
+
+def test_run_once_records_success_and_failure_with_backoff():
+    failing = {"TOPIX"}
+
+    def refresh(key):
+        if key in failing:
+            raise RuntimeError("fetch failed")
+
+    refresher = SnapshotRefresher(
+        keys=["SP500", "TOPIX"],
+        refresh=refresh,
+        interval=timedelta(seconds=30),
+        max_backoff=timedelta(seconds=100),
+        rng=random.Random(0),
+    )
+
+    assert refresher.run_once("SP500") is True
+    assert refresher.run_once("TOPIX") is False
+    assert refresher.run_once("TOPIX") is False
+
+    status = refresher.status()
+    assert status["SP500"]["last_success_at"] is not None
+    assert status["SP500"]["consecutive_failures"] == 0
+    assert status["SP500"]["last_duration_ms"] is not None
+    assert status["TOPIX"]["last_success_at"] is None
+    assert status["TOPIX"]["consecutive_failures"] == 2
+    assert status["TOPIX"]["total_failures"] == 2
+    assert status["TOPIX"]["last_error"] == "fetch failed"
+
+    assert refresher._delay_after(0) == 30
+    assert refresher._delay_after(1) == 60
+    assert refresher._delay_after(5) == 100
+
+    failing.clear()
+    assert refresher.run_once("TOPIX") is True
+    assert refresher.status()["TOPIX"]["consecutive_failures"] == 0
+    assert refresher.status()["TOPIX"]["total_failures"] == 2
+
+
+def test_background_thread_refreshes_every_key():
+    seen = set()
+    all_seen = threading.Event()
+
+    def refresh(key):
+        seen.add(key)
+        if seen == {"SP500", "TOPIX", "NIKKEI"}:
+            all_seen.set()
+
+    refresher = SnapshotRefresher(
+        keys=["SP500", "TOPIX", "NIKKEI"],
+        refresh=refresh,
+        interval=timedelta(seconds=60),
+    )
+    refresher.start()
+    try:
+        assert all_seen.wait(timeout=5)
+    finally:
+        refresher.stop()
+
+
+def test_due_keys_are_prepared_as_one_batch():
+    batches = []
+    refreshed = []
+    done = threading.Event()
+
+    def refresh(key):
+        refreshed.append(key)
+        if len(refreshed) == 3:
+            done.set()
+
+    refresher = SnapshotRefresher(
+        keys=["SP500", "TOPIX", "NIKKEI"],
+        refresh=refresh,
+        interval=timedelta(seconds=60),
+        before_batch=batches.append,
+    )
+    refresher.start()
+    try:
+        assert done.wait(timeout=5)
+    finally:
+        refresher.stop()
+
+    assert batches == [["SP500", "TOPIX", "NIKKEI"]]
+    assert sorted(refreshed) == ["NIKKEI", "SP500", "TOPIX"]
+
+
+def test_slow_key_does_not_delay_the_rest_of_the_batch():
+    release = threading.Event()
+    finished = []
+
+    def refresh(key):
+        if key == "SP500":
+            release.wait(timeout=5)
+        finished.append(key)
+        if key != "SP500" and len(finished) == 2:
+            release.set()
+
+    refresher = SnapshotRefresher(
+        keys=["SP500", "TOPIX", "NIKKEI"],
+        refresh=refresh,
+        interval=timedelta(seconds=60),
+        max_workers=3,
+    )
+    try:
+        refresher.run_batch(["SP500", "TOPIX", "NIKKEI"])
+    finally:
+        refresher.stop()
+
+    # SP500 は他の2指数が終わるまで待たされる（逐次実行なら5秒待って最初に終わる）
+    assert finished[-1] == "SP500"
+    assert refresher.status()["TOPIX"]["last_success_at"] is not None
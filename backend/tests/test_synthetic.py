@@ -0,0 +1,58 @@
+import os
+import sys
+from datetime import date
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from services import synthetic
+from services.macro_data_service import MacroDataService
+from services.sp500_market_service import SP500MarketService
+
+
+def test_business_days_and_day_of_year():
+    days = synthetic.business_days(date(2024, 1, 5), date(2024, 1, 9))
+
+    assert days.tolist() == [date(2024, 1, 5), date(2024, 1, 8), date(2024, 1, 9)]
+    assert synthetic.day_of_year(days).tolist() == [d.timetuple().tm_yday for d in days.tolist()]
+    assert len(synthetic.business_days(date(2024, 1, 6), date(2024, 1, 7))) == 0
+
+
+def test_drifting_prices_match_scalar_compounding():
+    dates, prices = synthetic.drifting_prices(
+        date(2023, 6, 1), date(2023, 8, 1), 100.0, 0.001, 0.006, "tag", drawdown=0.002
+    )
+    noise = synthetic.seeded_generator("tag").uniform(-0.006, 0.006, len(dates))
+
+    price = 100.0
+    expected = []
+    for current, n in zip(dates.tolist(), noise):
+        if (current.timetuple().tm_yday // 182) % 2 == 1:
+            n -= 0.002
+        price = price * (1 + 0.001 + n)
+        expected.append(price)
+    assert np.allclose(prices, expected)
+
+
+def test_fallback_histories_are_deterministic_per_seed_tag():
+    market = SP500MarketService(symbol="TEST")
+    first = market._fallback_history(date(1990, 1, 1), date(2024, 12, 31), "SP500")
+
+    assert first == market._fallback_history(date(1990, 1, 1), date(2024, 12, 31), "SP500")
+    assert first != market._fallback_history(date(1990, 1, 1), date(2024, 12, 31), "TOPIX")
+    assert all(date.fromisoformat(d).weekday() < 5 for d, _ in first)
+    assert isinstance(first[0][0], str) and isinstance(first[0][1], float)
+
+    macro = MacroDataService()
+    vix = macro._synthetic_range("vix", date(2020, 1, 1), date(2020, 3, 31))
+    assert vix == macro._synthetic_range("vix", date(2020, 1, 1), date(2020, 3, 31))
+    assert vix[0][0] == date(2020, 1, 1) and all(d.weekday() < 5 for d, _ in vix)
+
+
+def test_weekend_only_macro_range_still_has_a_point():
+    macro = MacroDataService()
+
+    weekend = macro._synthetic_range("cpi", date(2024, 1, 6), date(2024, 1, 7))
+    assert [d for d, _ in weekend] == [date(2024, 1, 6)]
+    assert isinstance(weekend[0][1], float)